@@ -0,0 +1,123 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from fastlog import get_logger
+
+log = get_logger("backfill")
+
+
+def flat_bar(t, price):
+    """A carried second nobody observed; recorders and the strategy skip these."""
+    return {
+        "t": t, "open": price, "high": price, "low": price, "close": price, "volume": 0,
+        "synthetic": True,
+    }
+
+
+def trades_to_bars(trades):
+    """Aggregate historical trade dicts (p, sz, st in ms) into 1s bars."""
+    bars = {}
+    for tr in sorted(trades, key=lambda x: x.get("st") or 0):
+        price = tr.get("p")
+        if price is None or tr.get("st") is None:
+            continue
+        t = int(tr["st"] // 1000)
+        bar = bars.get(t)
+        if bar is None:
+            bars[t] = {
+                "t": t,
+                "open": price,
+                "high": price,
+                "low": price,
+                "close": price,
+                "volume": tr.get("sz") or 0,
+            }
+        else:
+            bar["high"] = max(bar["high"], price)
+            bar["low"] = min(bar["low"], price)
+            bar["close"] = price
+            bar["volume"] += tr.get("sz") or 0
+    return [bars[t] for t in sorted(bars)]
+
+
+def rest_trade_source(rest, timeout=0.5):
+    """Backfill source that rebuilds missed bars from the REST trade history.
+
+    `timeout` bounds the HTTP call itself, so a hung request can't keep
+    the backfill worker busy past GapBackfill's budget.
+    """
+
+    def fetch(symbol, start, end):
+        return trades_to_bars(
+            rest.get_trades(symbol, start * 1000, end * 1000, timeout=timeout)
+        )
+
+    return fetch
+
+
+class GapBackfill:
+    """Rebuilds the 1s bars lost while the stream was down.
+
+    `fetch(symbol, start, end)` returns bars for seconds in [start, end).
+    It gets at most `budget` seconds; any second it can't supply (or all
+    of them, if it fails or times out) is filled by carrying the last
+    close forward, which is what bar_builder itself emits for a quiet
+    second. Carried seconds are synthetic, not observed: they carry
+    "synthetic": True, are logged as such, are left out of the recorded CSV
+    and the journal, and keep the strategy cold until they leave its window. Gaps longer than `max_gap` only have their most recent
+    `max_gap` seconds rebuilt. While an earlier fetch is still running no
+    new one is queued behind it; that gap is carried instead.
+    """
+
+    def __init__(self, fetch=None, max_gap=300, budget=0.5):
+        self.fetch = fetch
+        self.max_gap = max_gap
+        self.budget = budget
+        self.gaps = 0
+        self.bars_fetched = 0
+        self.bars_carried = 0
+        self.fetches_skipped = 0
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="backfill")
+        self._job = None
+
+    def fill(self, symbol, last_bar, until):
+        start = last_bar["t"] + 1
+        if until <= start:
+            return []
+        if until - start > self.max_gap:
+            start = until - self.max_gap
+
+        fetched = {}
+        if self.fetch is not None:
+            if self._job is not None and not self._job.done():
+                self.fetches_skipped += 1
+                log.warning("Backfill source still busy with an earlier gap, not queueing")
+            else:
+                self._job = self._pool.submit(self.fetch, symbol, start, until)
+                try:
+                    fetched = {b["t"]: b for b in self._job.result(timeout=self.budget)}
+                except Exception as e:
+                    log.warning("Backfill fetch failed, carrying last close forward: %r", e)
+
+        bars = []
+        carried = 0
+        close = last_bar["close"]
+        for t in range(start, until):
+            bar = fetched.get(t)
+            if bar is None:
+                bar = flat_bar(t, close)
+                carried += 1
+            else:
+                self.bars_fetched += 1
+            bars.append(bar)
+            close = bar["close"]
+
+        self.gaps += 1
+        self.bars_carried += carried
+        log.info("Backfilled %d bars (%d from source) for %s", len(bars), len(bars) - carried, symbol)
+        if carried:
+            log.warning(
+                "%d synthetic flat bars for %s in [%d, %d): no trades from source",
+                carried, symbol, start, until,
+                synthetic=carried, start=start, end=until,
+            )
+        return bars
@@ -1,10 +1,16 @@
+import os
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 from collections import deque
 import time
 from datetime import datetime
 import pytz
+from concurrent.futures import ProcessPoolExecutor
+
+from bt_kernel import FillModel, simulate
+from charts import render_many
+from mean_reversion import MeanReversion
+from result_cache import ResultCache, code_version
 
 # === Config ===
 TICK_SIZE = 0.25
@@ -12,32 +18,82 @@ TICK_VALUE = 0.50
 OHLC_PATH = "OHLC"
 
 
-def strategy(bar, state, lookback, threshold_factor):
-    if "closes" not in state:
-        state["closes"] = deque(maxlen=lookback)
-
-    state["closes"].append(bar["close"])
+COMMISSION_PER_TRADE = 0.78
+BAR_COLUMNS = ["time", "open", "high", "low", "close", "volume"]
+SESSION_GAP = 1800  # seconds without bars that end a session (CME's daily halt is 1h)
+CHART_DIR = "charts"
 
-    if len(state["closes"]) < lookback:
-        return None
 
-    closes = np.array(state["closes"])
-    mean_close = closes.mean()
-    current_close = closes[-1]
-    threshold = threshold_factor * mean_close
+def _trade_row(df, entry_idx, exit_idx, entry, exit_price):
+    ticks = int((exit_price - entry) / TICK_SIZE)
+    pnl = ticks * TICK_VALUE - COMMISSION_PER_TRADE
+    duration_bars = exit_idx - entry_idx
 
-    if current_close < mean_close - threshold:
-        return {"side": "BUY", "entry": current_close}
+    # ✅ Get entry + exit timestamp from CSV and convert to EST
+    entry_ts = df.loc[entry_idx, "time"]
+    exit_ts = df.loc[exit_idx, "time"]
 
-    return None
+    entry_time_est = datetime.fromtimestamp(entry_ts, pytz.utc).astimezone(
+        pytz.timezone("US/Eastern")
+    )
+    exit_time_est = datetime.fromtimestamp(exit_ts, pytz.utc).astimezone(
+        pytz.timezone("US/Eastern")
+    )
 
+    return {
+        "side": "BUY",
+        "entry": entry,
+        "exit": exit_price,
+        "ticks": ticks,
+        "pnl": pnl,
+        "duration_sec": duration_bars,
+        "entry_time_est": entry_time_est,
+        "exit_time_est": exit_time_est,
+    }
+
+
+def run_backtest(df, strategy, fill=None, use_jit=True):
+    """Bracketed long-only backtest of `strategy` over the bars in `df`.
+
+    Strategies with a batch_signals() form run through the array kernel in
+    bt_kernel (Numba-compiled when available); anything else falls back to
+    the bar-by-bar loop. Both produce the same trades under the default
+    fill model; other FillModels (next-bar entry, slippage, intrabar
+    ordering) need the kernel.
+    """
+    if not hasattr(strategy, "batch_signals"):
+        if fill is not None:
+            raise ValueError("fill models need a strategy with batch_signals()")
+        return run_backtest_loop(df, strategy)
+
+    close = df["close"].to_numpy(dtype=np.float64)
+    signal = strategy.batch_signals(close)
+    offset = strategy.stop_ticks * strategy.tick_size
+    entry_pos, exit_pos, entries, exits = simulate(
+        df["open"].to_numpy(dtype=np.float64),
+        df["high"].to_numpy(dtype=np.float64),
+        df["low"].to_numpy(dtype=np.float64),
+        close,
+        signal,
+        offset,
+        fill=fill,
+        times=df["time"].to_numpy(),
+        tick_size=strategy.tick_size,
+        use_jit=use_jit,
+    )
 
-COMMISSION_PER_TRADE = 0.78
+    labels = df.index
+    trades = [
+        _trade_row(df, labels[i], labels[j], float(e), float(x))
+        for i, j, e, x in zip(entry_pos, exit_pos, entries, exits)
+    ]
+    return pd.DataFrame(trades)
 
 
-def run_backtest(df, strategy):
+def run_backtest_loop(df, strategy):
     trades = []
-    state = {"active_trade": None}
+    state = strategy.new_state()
+    state["active_trade"] = None
 
     for idx, bar in df.iterrows():
         if state["active_trade"]:
@@ -46,67 +102,86 @@ def run_backtest(df, strategy):
             stop = trade["stop"]
             target = trade["target"]
 
-            stopped = exited = False
-            exit_price = None
-
-            # Check stop first
-            if bar["open"] <= stop:
-                stopped, exit_price = True, stop
-            elif bar["open"] >= target:
-                exited, exit_price = True, target
-            else:
-                if bar["high"] >= target:
-                    exited, exit_price = True, target
-                elif bar["low"] <= stop:
-                    stopped, exit_price = True, stop
-
-            if stopped or exited:
-                ticks = int((exit_price - entry) / TICK_SIZE)
-                pnl = ticks * TICK_VALUE - COMMISSION_PER_TRADE
-                duration_bars = idx - trade["entry_idx"]
-
-                # ✅ Get entry + exit timestamp from CSV and convert to EST
-                entry_ts = df.loc[trade["entry_idx"], "time"]
-                exit_ts = df.loc[idx, "time"]
-
-                entry_time_est = datetime.fromtimestamp(entry_ts, pytz.utc).astimezone(
-                    pytz.timezone("US/Eastern")
-                )
-                exit_time_est = datetime.fromtimestamp(exit_ts, pytz.utc).astimezone(
-                    pytz.timezone("US/Eastern")
-                )
+            # A gap through either level fills at it; otherwise the bar's
+            # high is checked before its low (target first).
+            reason = strategy.on_tick(bar["open"], trade)
+            if reason is None:
+                reason = "TARGET" if strategy.on_tick(bar["high"], trade) == "TARGET" else None
+            if reason is None:
+                reason = "STOP" if strategy.on_tick(bar["low"], trade) == "STOP" else None
+
+            if reason is not None:
+                exit_price = stop if reason == "STOP" else target
+                trades.append(_trade_row(df, trade["entry_idx"], idx, entry, exit_price))
+                state["active_trade"] = None
+                state["position"] = None
+
+        # The window advances on every bar, in or out of a trade, as it does live.
+        signal = strategy.on_bar(bar, state)
+        if signal and signal["side"] == "BUY":
+            state["active_trade"] = {
+                "side": "BUY",
+                "entry": signal["entry"],
+                "stop": signal["stop"],
+                "target": signal["target"],
+                "entry_idx": idx,
+            }
+            state["position"] = "BUY"
 
-                trades.append(
-                    {
-                        "side": "BUY",
-                        "entry": entry,
-                        "exit": exit_price,
-                        "ticks": ticks,
-                        "pnl": pnl,
-                        "duration_sec": duration_bars,
-                        "entry_time_est": entry_time_est,
-                        "exit_time_est": exit_time_est,
-                    }
-                )
+    return pd.DataFrame(trades)
 
-                state["active_trade"] = None
 
-        if not state["active_trade"]:
-            signal = strategy(bar, state)
-            if signal and signal["side"] == "BUY":
-                entry = signal["entry"]
-                stop = entry - STOP_TICKS * TICK_SIZE
-                target = entry + STOP_TICKS * TICK_SIZE
-
-                state["active_trade"] = {
-                    "side": "BUY",
-                    "entry": entry,
-                    "stop": stop,
-                    "target": target,
-                    "entry_idx": idx,
-                }
+# ---------- Per-session runs -------------
+def read_day(path):
+    """One recorded day of 1s bars, with or without the header row."""
+    with open(path) as f:
+        first = f.readline()
+    if first[:1].isdigit():
+        return pd.read_csv(path, header=None, names=BAR_COLUMNS)
+    return pd.read_csv(path)
+
+
+def split_sessions(df, max_gap=SESSION_GAP):
+    """Split bars wherever the clock jumps by more than `max_gap` seconds."""
+    if df.empty:
+        return []
+    breaks = np.flatnonzero(np.diff(df["time"].to_numpy()) > max_gap) + 1
+    bounds = [0, *breaks.tolist(), len(df)]
+    return [
+        df.iloc[a:b].reset_index(drop=True) for a, b in zip(bounds[:-1], bounds[1:])
+    ]
+
+
+def session_label(df):
+    start = datetime.fromtimestamp(df["time"].iloc[0], pytz.utc)
+    return start.astimezone(pytz.timezone("US/Eastern")).strftime("%Y-%m-%d %H:%M")
+
+
+def _run_day(job):
+    path, strategy, fill = job
+    out = []
+    for session in split_sessions(read_day(path)):
+        trades = run_backtest(session, strategy, fill=fill)
+        if not trades.empty:
+            trades.insert(0, "session", session_label(session))
+        out.append(trades)
+    return out
 
-    return pd.DataFrame(trades)
+
+def run_sessions(paths, strategy, fill=None, executor=None):
+    """Backtest each session on its own and merge the trades in time order.
+
+    Strategy state and open trades never carry across a session boundary
+    (a day file, or a gap longer than SESSION_GAP inside one). Days run
+    as independent jobs on `executor` (a process pool) when given.
+    """
+    jobs = [(path, strategy, fill) for path in paths]
+    days = executor.map(_run_day, jobs) if executor is not None else map(_run_day, jobs)
+    frames = [t for day in days for t in day if not t.empty]
+    if not frames:
+        return pd.DataFrame()
+    trades = pd.concat(frames, ignore_index=True)
+    return trades.sort_values("entry_time_est", kind="stable", ignore_index=True)
 
 
 if __name__ == "__main__":
@@ -125,14 +200,28 @@ if __name__ == "__main__":
     lookback_values = [120]
     threshold_values = [0.00075]
     stop_tick_values = [50]
-
-    df_list = [pd.read_csv(f) for f in data_files]
-    df = pd.concat(df_list, ignore_index=True)
+    fill = FillModel()  # e.g. FillModel("next_open", slippage_ticks=1, intrabar="pessimistic")
+    per_session = True  # False: one pass over all days glued together
+    workers = None  # process pool size for per-session runs (None = CPU count)
+    use_cache = True  # reuse results for the same data + code + parameters
+    chart_format = "png"  # or "svg"; one equity chart per parameter set
+
+    cache = ResultCache() if use_cache else None
+    if cache is not None:
+        data_digest = cache.data_digest(data_files)
+        version = code_version()
+        cache.prune(version)  # results from older strategy/backtest code are stale
+
+    executor = None  # process pool, started on the first cache miss
+    if not per_session:
+        df_list = [read_day(f) for f in data_files]
+        df = pd.concat(df_list, ignore_index=True)
 
     total_tests = len(lookback_values) * len(threshold_values) * len(stop_tick_values)
     test_counter = 0
     start_time = time.time()
     results = []
+    chart_jobs = []
     start_time = time.time()
 
     for lookback in lookback_values:
@@ -146,14 +235,39 @@ if __name__ == "__main__":
                     end="\r",
                 )
 
-                STOP_TICKS = stop_ticks
-
-                def strategy_wrapper(bar, state):
-                    return strategy(
-                        bar, state, lookback=lookback, threshold_factor=threshold
+                strategy = MeanReversion(
+                    lookback=lookback,
+                    threshold_factor=threshold,
+                    stop_ticks=stop_ticks,
+                    tick_size=TICK_SIZE,
+                )
+                trades = None
+                if cache is not None:
+                    key = cache.key(
+                        data_digest,
+                        version,
+                        {
+                            "lookback": lookback,
+                            "threshold": threshold,
+                            "stop_ticks": stop_ticks,
+                            "tick_size": TICK_SIZE,
+                            "tick_value": TICK_VALUE,
+                            "commission": COMMISSION_PER_TRADE,
+                            "fill": repr(fill),
+                            "per_session": per_session,
+                            "session_gap": SESSION_GAP,
+                        },
                     )
-
-                trades = run_backtest(df, strategy_wrapper)
+                    trades = cache.get(key)
+                if trades is None:
+                    if per_session:
+                        if executor is None:
+                            executor = ProcessPoolExecutor(max_workers=workers)
+                        trades = run_sessions(data_files, strategy, fill, executor)
+                    else:
+                        trades = run_backtest(df, strategy, fill=fill)
+                    if cache is not None:
+                        cache.put(key, trades)
 
                 if not trades.empty:
                     total_pnl = trades["pnl"].sum()
@@ -173,6 +287,24 @@ if __name__ == "__main__":
                     avg_duration = "0m 0s"
                     max_drawdown = 0
 
+                if per_session and not trades.empty:
+                    by_session = trades.groupby("session")["pnl"].agg(["count", "sum"])
+                    print(f"\nLookback={lookback}, Threshold={threshold}, Stop={stop_ticks}")
+                    print(by_session.rename(columns={"count": "trades", "sum": "pnl"}).to_string())
+
+                if not trades.empty:
+                    chart_jobs.append(
+                        {
+                            "kind": "equity",
+                            "path": os.path.join(
+                                CHART_DIR,
+                                f"equity_L{lookback}_T{threshold}_S{stop_ticks}.{chart_format}",
+                            ),
+                            "equity": np.insert(trades["pnl"].cumsum().values, 0, 0),
+                            "title": f"Equity Curve (Lookback={lookback}, Threshold={threshold}, Stop={stop_ticks})",
+                        }
+                    )
+
                 results.append(
                     {
                         "lookback": lookback,
@@ -186,18 +318,16 @@ if __name__ == "__main__":
                     }
                 )
 
-    equity = trades["pnl"].cumsum().values
-    equity = np.insert(equity, 0, 0)
+    if executor is not None:
+        executor.shutdown()
+
     print("\n===== Optimization Complete =====")
+    if cache is not None:
+        print(f"Result cache: {cache.stats()}")
     results_df = pd.DataFrame(results)
     best = results_df.sort_values(by="total_pnl", ascending=False).head(10)
     print(best)
-    plt.figure(figsize=(12, 6))
-    plt.plot(equity)
-    plt.title(
-        f"Equity Curve (Lookback={lookback}, Threshold={threshold}, Stop={stop_ticks})"
-    )
-    plt.xlabel("Trade Number")
-    plt.ylabel("Cumulative PnL")
-    plt.grid(True)
-    plt.show()
+
+    paths = render_many(chart_jobs, workers)
+    if paths:
+        print(f"📈 {len(paths)} equity chart(s) written to {CHART_DIR}/ (last: {paths[-1]})")
@@ -0,0 +1,102 @@
+import time
+
+
+class TopOfBook:
+    """Best bid/ask, sizes and last price for one symbol, updated in place.
+
+    Quote updates may be partial, so only the fields present in an update
+    overwrite the current values.
+    """
+
+    __slots__ = ("symbol", "bid", "ask", "bid_size", "ask_size", "last", "ts", "updated")
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.bid = self.ask = None
+        self.bid_size = self.ask_size = None
+        self.last = None
+        self.ts = None
+        self.updated = 0.0
+
+    def on_quote(self, q):
+        if q.bid is not None:
+            self.bid = q.bid
+        if q.ask is not None:
+            self.ask = q.ask
+        if q.bid_size is not None:
+            self.bid_size = q.bid_size
+        if q.ask_size is not None:
+            self.ask_size = q.ask_size
+        if q.last is not None:
+            self.last = q.last
+        if q.ts is not None:
+            self.ts = q.ts
+        self.updated = time.monotonic()
+
+    def is_valid(self):
+        return self.bid is not None and self.ask is not None
+
+    def age(self):
+        return time.monotonic() - self.updated
+
+    def mid(self):
+        if self.bid is None or self.ask is None:
+            return None
+        return (self.bid + self.ask) / 2.0
+
+    def spread(self):
+        if self.bid is None or self.ask is None:
+            return None
+        return self.ask - self.bid
+
+    def microprice(self):
+        """Size-weighted mid: leans toward the side with less resting size."""
+        bid, ask, bs, asz = self.bid, self.ask, self.bid_size, self.ask_size
+        if bid is None or ask is None:
+            return None
+        if not bs or not asz:
+            return (bid + ask) / 2.0
+        return (bid * asz + ask * bs) / (bs + asz)
+
+    def snapshot(self):
+        return {
+            "symbol": self.symbol,
+            "bid": self.bid,
+            "ask": self.ask,
+            "bid_size": self.bid_size,
+            "ask_size": self.ask_size,
+            "last": self.last,
+            "ts": self.ts,
+        }
+
+
+class Books:
+    """TopOfBook per symbol, fed straight from the WebSocket thread."""
+
+    def __init__(self, symbols):
+        self._books = {sym: TopOfBook(sym) for sym in symbols}
+        # Records without an exchSym can only belong to a lone symbol.
+        self._default = self._books[symbols[0]] if len(symbols) == 1 else None
+
+    def __getitem__(self, symbol):
+        return self._books[symbol]
+
+    def get(self, symbol):
+        return self._books.get(symbol)
+
+    def on_quotes(self, records):
+        books = self._books
+        touched = []
+        for q in records:
+            book = books.get(q.sym, self._default)
+            if book is not None:
+                book.on_quote(q)
+                touched.append(book)
+        return touched
+
+    def on_trades(self, records):
+        books = self._books
+        for r in records:
+            book = books.get(r.sym, self._default)
+            if book is not None and r.price is not None:
+                book.last = r.price
@@ -0,0 +1,228 @@
+import hashlib
+
+import numpy as np
+
+try:
+    from numba import njit
+
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+
+ENTRY_CLOSE = 0  # fill at the signal bar's close
+ENTRY_NEXT_OPEN = 1  # fill at the following bar's open
+
+INTRABAR_OPTIMISTIC = 0  # bar touches both levels: target first
+INTRABAR_PESSIMISTIC = 1  # ... stop first
+INTRABAR_NEAREST = 2  # ... whichever extreme is closer to the open first
+INTRABAR_SUBBAR = 3  # ... walk finer bars; pessimistic where there are none
+
+_ENTRY_MODES = {"close": ENTRY_CLOSE, "next_open": ENTRY_NEXT_OPEN}
+_INTRABAR_MODES = {
+    "optimistic": INTRABAR_OPTIMISTIC,
+    "pessimistic": INTRABAR_PESSIMISTIC,
+    "nearest": INTRABAR_NEAREST,
+    "subbar": INTRABAR_SUBBAR,
+}
+
+
+class FillModel:
+    """How the bar kernel fills entries and exits.
+
+    entry: "close" (signal bar close) or "next_open" (the following bar's
+    open, as a market order sent at the close would).
+    slippage_ticks: adverse ticks on entries and stop exits; targets are
+    resting limits and fill at their price.
+    intrabar: which level wins when one bar reaches both stop and target:
+    "optimistic", "pessimistic", "nearest" (to the open), or "subbar"
+    (resolve against `sub_bars`, a finer OHLC frame with a time column).
+    The default reproduces the original run_backtest exactly.
+    """
+
+    def __init__(self, entry="close", slippage_ticks=0, intrabar="optimistic", sub_bars=None):
+        if entry not in _ENTRY_MODES:
+            raise ValueError(f"unknown entry fill {entry!r}")
+        if intrabar not in _INTRABAR_MODES:
+            raise ValueError(f"unknown intrabar ordering {intrabar!r}")
+        if intrabar == "subbar" and sub_bars is None:
+            raise ValueError("intrabar='subbar' needs sub_bars")
+        self.entry = entry
+        self.slippage_ticks = slippage_ticks
+        self.intrabar = intrabar
+        self.sub_bars = sub_bars
+        self.sub_bars_digest = None if sub_bars is None else _frame_digest(sub_bars)
+
+    def __repr__(self):
+        # The repr keys cached results, so it names the sub-bar data too.
+        sub = f", sub_bars={self.sub_bars_digest}" if self.sub_bars_digest else ""
+        return (
+            f"FillModel(entry={self.entry!r}, slippage_ticks={self.slippage_ticks}, "
+            f"intrabar={self.intrabar!r}{sub})"
+        )
+
+
+def _frame_digest(frame):
+    """Short content hash of a column -> array mapping (e.g. a DataFrame)."""
+    h = hashlib.sha256()
+    for col in frame.keys():
+        h.update(str(col).encode())
+        h.update(np.ascontiguousarray(np.asarray(frame[col])).tobytes())
+    return h.hexdigest()[:16]
+
+
+def subbar_ranges(bar_times, sub_times, bar_seconds=None):
+    """[start, end) rows of the finer bars that fall inside each bar."""
+    bar_times = np.asarray(bar_times, dtype=np.int64)
+    sub_times = np.asarray(sub_times, dtype=np.int64)
+    if bar_seconds is None:
+        diffs = np.diff(bar_times)
+        bar_seconds = int(np.median(diffs)) if diffs.size else 1
+    start = np.searchsorted(sub_times, bar_times, side="left")
+    end = np.searchsorted(sub_times, bar_times + bar_seconds, side="left")
+    return start.astype(np.int64), end.astype(np.int64)
+
+
+def _simulate(
+    open_, high, low, close, signal, offset, entry_mode, slip, intrabar,
+    sub_start, sub_end, sub_high, sub_low, entry_idx, exit_idx, entry_px, exit_px,
+):
+    """One long trade at a time, bracketed `offset` either side of the entry.
+
+    Exit checks for a bar run before that bar's entry check: a gap through
+    the stop or target at the open fills there, otherwise a bar reaching
+    only one level fills at it and a bar reaching both is settled by
+    `intrabar`. Entries and stop exits give up `slip` points. Fills go
+    into the preallocated output arrays; returns the count.
+    """
+    n = len(close)
+    count = 0
+    active = False
+    pending = False
+    entry = stop = target = 0.0
+    start = 0
+
+    for i in range(n):
+        if pending:
+            # Market order sent at the previous close fills at this open.
+            entry = open_[i] + slip
+            stop = entry - offset
+            target = entry + offset
+            start = i
+            active = True
+            pending = False
+
+        if active:
+            exit_price = 0.0
+            done = False
+            if open_[i] <= stop:
+                exit_price = stop - slip
+                done = True
+            elif open_[i] >= target:
+                exit_price = target
+                done = True
+            else:
+                hit_target = high[i] >= target
+                hit_stop = low[i] <= stop
+                if hit_target and hit_stop:
+                    stop_first = True
+                    if intrabar == INTRABAR_OPTIMISTIC:
+                        stop_first = False
+                    elif intrabar == INTRABAR_NEAREST:
+                        stop_first = open_[i] - low[i] < high[i] - open_[i]
+                    elif intrabar == INTRABAR_SUBBAR:
+                        for j in range(sub_start[i], sub_end[i]):
+                            sub_stop = sub_low[j] <= stop
+                            if sub_stop or sub_high[j] >= target:
+                                # A sub-bar that still holds both stays pessimistic.
+                                stop_first = sub_stop
+                                break
+                    hit_target = not stop_first
+                    hit_stop = stop_first
+                if hit_target:
+                    exit_price = target
+                    done = True
+                elif hit_stop:
+                    exit_price = stop - slip
+                    done = True
+
+            if done:
+                entry_idx[count] = start
+                exit_idx[count] = i
+                entry_px[count] = entry
+                exit_px[count] = exit_price
+                count += 1
+                active = False
+
+        if not active and not pending and signal[i]:
+            if entry_mode == ENTRY_NEXT_OPEN:
+                pending = i + 1 < n
+            else:
+                entry = close[i] + slip
+                stop = entry - offset
+                target = entry + offset
+                start = i
+                active = True
+
+    return count
+
+
+_simulate_jit = njit(cache=True)(_simulate) if HAVE_NUMBA else None
+
+
+def simulate(open_, high, low, close, signal, offset, fill=None, times=None,
+             tick_size=0.25, use_jit=True):
+    """Run the entry/exit state machine; returns (entry_idx, exit_idx, entry, exit).
+
+    Uses the Numba-compiled kernel when Numba (optional, see
+    requirements.txt) is installed. Otherwise the same function runs as a
+    per-bar Python loop over lists, slower than the compiled kernel but
+    still far faster than iterrows. Both do identical float64 arithmetic;
+    check_kernel.py verifies they match each other and run_backtest_loop.
+    `times` (bar start seconds) is only needed for intrabar="subbar".
+    """
+    fill = fill or FillModel()
+    n = len(close)
+    entry_idx = np.zeros(n, dtype=np.int64)
+    exit_idx = np.zeros(n, dtype=np.int64)
+    entry_px = np.zeros(n, dtype=np.float64)
+    exit_px = np.zeros(n, dtype=np.float64)
+
+    if fill.intrabar == "subbar":
+        sub = fill.sub_bars
+        sub_start, sub_end = subbar_ranges(times, sub["time"].to_numpy())
+        sub_high = sub["high"].to_numpy(dtype=np.float64)
+        sub_low = sub["low"].to_numpy(dtype=np.float64)
+    else:
+        sub_start = sub_end = np.zeros(n, dtype=np.int64)
+        sub_high = sub_low = np.zeros(0, dtype=np.float64)
+
+    args = (
+        np.ascontiguousarray(open_, dtype=np.float64),
+        np.ascontiguousarray(high, dtype=np.float64),
+        np.ascontiguousarray(low, dtype=np.float64),
+        np.ascontiguousarray(close, dtype=np.float64),
+        np.ascontiguousarray(signal, dtype=np.bool_),
+        float(offset),
+        _ENTRY_MODES[fill.entry],
+        fill.slippage_ticks * tick_size,
+        _INTRABAR_MODES[fill.intrabar],
+        np.ascontiguousarray(sub_start, dtype=np.int64),
+        np.ascontiguousarray(sub_end, dtype=np.int64),
+        np.ascontiguousarray(sub_high),
+        np.ascontiguousarray(sub_low),
+    )
+
+    if use_jit and HAVE_NUMBA:
+        count = _simulate_jit(*args, entry_idx, exit_idx, entry_px, exit_px)
+    else:
+        # Python lists index far faster than NumPy scalars in a plain loop.
+        out_ei, out_xi, out_ep, out_xp = [0] * n, [0] * n, [0.0] * n, [0.0] * n
+        args = tuple(a.tolist() if isinstance(a, np.ndarray) else a for a in args)
+        count = _simulate(*args, out_ei, out_xi, out_ep, out_xp)
+        entry_idx[:count] = out_ei[:count]
+        exit_idx[:count] = out_xi[:count]
+        entry_px[:count] = out_ep[:count]
+        exit_px[:count] = out_xp[:count]
+
+    return entry_idx[:count], exit_idx[:count], entry_px[:count], exit_px[:count]
@@ -0,0 +1,310 @@
+"""Raw WebSocket message capture for exact replay.
+
+Every message on_message receives is stamped with its receive time and
+appended to a daily log (capture/ws_MM.DD.YYYY.cap). The WebSocket thread
+only does an SPSC put; a writer thread batches messages into blocks,
+compresses them (zstd when installed, zlib otherwise) and appends them.
+
+File layout:
+    magic b"WSCAP1\\n"
+    block*: header (codec, compressed len, raw len, first ts, last ts,
+            count, crc32 of the compressed bytes) + compressed payload
+    payload: record* of (recv ts ns, message len) + message bytes
+
+A sidecar .idx file holds (first ts, last ts, offset) per block so a
+reader can seek straight to a time; it is rebuilt from the block headers
+if it's missing or behind. A torn block at the tail (crash mid-write)
+fails its length/CRC check and ends the read.
+"""
+import bisect
+import os
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime
+
+from fastlog import get_logger
+from spsc import SpscQueue
+
+try:
+    import zstandard
+
+    _ZSTD_C = zstandard.ZstdCompressor(level=3)
+    _ZSTD_D = zstandard.ZstdDecompressor()
+except ImportError:
+    zstandard = None
+
+log = get_logger("capture")
+
+MAGIC = b"WSCAP1\n"
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+_BLOCK = struct.Struct("<BIIqqII")  # codec, clen, rlen, first_ns, last_ns, count, crc
+_RECORD = struct.Struct("<qI")  # recv ts ns, message length
+_INDEX = struct.Struct("<qqQ")  # first_ns, last_ns, block offset
+
+
+def capture_path(directory, ts=None):
+    day = datetime.fromtimestamp(ts if ts is not None else time.time())
+    return os.path.join(directory, f"ws_{day:%m.%d.%Y}.cap")
+
+
+def _compress(raw, codec):
+    if codec == CODEC_ZSTD:
+        return _ZSTD_C.compress(raw)
+    return zlib.compress(raw, 6)
+
+
+def _decompress(data, codec, raw_len):
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("capture block is zstd-compressed; pip install zstandard")
+        return _ZSTD_D.decompress(data, max_output_size=raw_len)
+    return zlib.decompress(data)
+
+
+# ---------- Writer -------------
+class CaptureWriter:
+    """Off-thread capture of raw messages into daily block-compressed logs."""
+
+    def __init__(self, directory="capture", block_bytes=256 * 1024, flush_secs=1.0,
+                 capacity=1 << 16):
+        self.directory = directory
+        self.block_bytes = block_bytes
+        self.flush_secs = flush_secs
+        self.codec = CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+        self.queue = SpscQueue(capacity)
+        self.messages = 0
+        self.blocks = 0
+        self.bytes_raw = 0
+        self.bytes_written = 0
+        self._path = None
+        self._f = None
+        self._idx = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    # Called on the WebSocket thread: one clock read and one ring put.
+    def put(self, message):
+        self.queue.put((time.time_ns(), message))
+
+    @property
+    def dropped(self):
+        return self.queue.dropped
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, daemon=True, name="ws-capture")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        buf = bytearray()
+        first = last = None
+        count = 0
+        deadline = time.monotonic() + self.flush_secs
+        while True:
+            stopping = self._stop.is_set()
+            if not stopping:
+                self.queue.wait(timeout=max(0.0, deadline - time.monotonic()))
+            for ts, message in self.queue.get_many():
+                if isinstance(message, str):
+                    message = message.encode()
+                if first is not None and self._day(ts) != self._day(first):
+                    self._write_block(buf, first, last, count)  # roll to the new day
+                    buf, first, count = bytearray(), None, 0
+                if first is None:
+                    first = ts
+                last = ts
+                buf += _RECORD.pack(ts, len(message))
+                buf += message
+                count += 1
+                if len(buf) >= self.block_bytes:
+                    # Cut inside a burst too, so no block grows past block_bytes
+                    # by more than one message.
+                    self._write_block(buf, first, last, count)
+                    buf, first, count = bytearray(), None, 0
+            if count and (stopping or time.monotonic() >= deadline):
+                self._write_block(buf, first, last, count)
+                buf, first, count = bytearray(), None, 0
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_secs
+            if stopping and not self.queue.occupancy:
+                break
+        self._close_files()
+
+    @staticmethod
+    def _day(ts_ns):
+        return time.localtime(ts_ns / 1e9)[:3]
+
+    def _open(self, ts_ns):
+        path = capture_path(self.directory, ts_ns / 1e9)
+        if path == self._path:
+            return
+        self._close_files()
+        fresh = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not fresh:
+            _repair(path)
+        self._f = open(path, "ab")
+        if fresh:
+            self._f.write(MAGIC)
+        self._idx = open(path + ".idx", "ab")
+        self._path = path
+
+    def _write_block(self, buf, first, last, count):
+        self._open(first)
+        raw = bytes(buf)
+        data = _compress(raw, self.codec)
+        offset = self._f.tell()
+        header = _BLOCK.pack(self.codec, len(data), len(raw), first, last, count, zlib.crc32(data))
+        self._f.write(header + data)
+        self._f.flush()
+        self._idx.write(_INDEX.pack(first, last, offset))
+        self._idx.flush()
+        self.messages += count
+        self.blocks += 1
+        self.bytes_raw += len(raw)
+        self.bytes_written += len(header) + len(data)
+
+    def _close_files(self):
+        for f in (self._f, self._idx):
+            if f is not None:
+                f.close()
+        self._f = self._idx = None
+        self._path = None
+
+    def stats(self):
+        return {
+            "messages": self.messages,
+            "blocks": self.blocks,
+            "dropped": self.dropped,
+            "ratio": self.bytes_raw / self.bytes_written if self.bytes_written else None,
+            "queue": self.queue.stats(),
+        }
+
+
+def _scan_blocks(path):
+    """(first_ns, last_ns, offset) for every intact block, from the headers."""
+    blocks = []
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a capture file")
+        size = os.fstat(f.fileno()).st_size
+        pos = len(MAGIC)
+        while pos + _BLOCK.size <= size:
+            f.seek(pos)
+            _, clen, _, first, last, _, crc = _BLOCK.unpack(f.read(_BLOCK.size))
+            end = pos + _BLOCK.size + clen
+            if end > size:
+                break
+            blocks.append((first, last, pos))
+            pos = end
+    return blocks, pos
+
+
+def _repair(path):
+    """Cut a torn tail block and bring the index back in line before appending."""
+    blocks, good = _scan_blocks(path)
+    size = os.path.getsize(path)
+    if good < size:
+        log.warning("Capture %s: dropping %d torn bytes", path, size - good)
+        with open(path, "r+b") as f:
+            f.truncate(good)
+    idx_path = path + ".idx"
+    indexed = os.path.getsize(idx_path) // _INDEX.size if os.path.exists(idx_path) else -1
+    if indexed != len(blocks) or good < size:
+        with open(idx_path, "wb") as idx:
+            for entry in blocks:
+                idx.write(_INDEX.pack(*entry))
+
+
+# ---------- Reader -------------
+class CaptureReader:
+    """Stream messages back out of a capture file, optionally from a given time."""
+
+    def __init__(self, path):
+        self.path = path
+        self.index = self._load_index()
+
+    def _load_index(self):
+        idx_path = self.path + ".idx"
+        entries = []
+        if os.path.exists(idx_path):
+            with open(idx_path, "rb") as f:
+                data = f.read()
+            usable = len(data) - len(data) % _INDEX.size
+            entries = [_INDEX.unpack_from(data, i) for i in range(0, usable, _INDEX.size)]
+        scanned, _ = _scan_blocks(self.path)
+        if len(entries) != len(scanned):
+            entries = scanned  # stale or missing index: trust the block headers
+        return entries
+
+    def time_range(self):
+        if not self.index:
+            return None
+        return self.index[0][0], self.index[-1][1]
+
+    def messages(self, start_ns=None, end_ns=None, decode=True):
+        """Yield (recv_ts_ns, message) in capture order."""
+        first_block = 0
+        if start_ns is not None:
+            lasts = [e[1] for e in self.index]
+            first_block = bisect.bisect_left(lasts, start_ns)
+        with open(self.path, "rb") as f:
+            for _, _, offset in self.index[first_block:]:
+                f.seek(offset)
+                header = f.read(_BLOCK.size)
+                if len(header) < _BLOCK.size:
+                    return
+                codec, clen, rlen, first, last, count, crc = _BLOCK.unpack(header)
+                if end_ns is not None and first > end_ns:
+                    return
+                data = f.read(clen)
+                if len(data) != clen or zlib.crc32(data) != crc:
+                    log.warning("Capture %s: corrupt block at %d, stopping", self.path, offset)
+                    return
+                raw = _decompress(data, codec, rlen)
+                pos = 0
+                for _ in range(count):
+                    ts, n = _RECORD.unpack_from(raw, pos)
+                    pos += _RECORD.size
+                    if (start_ns is None or ts >= start_ns) and (end_ns is None or ts <= end_ns):
+                        msg = raw[pos : pos + n]
+                        yield ts, msg.decode() if decode else msg
+                    pos += n
+
+    def replay(self, handler, speed=1.0, start_ns=None, end_ns=None):
+        """Call handler(message) at the captured pace; speed 10 = 10x, None = flat out."""
+        t0 = first = None
+        n = 0
+        for ts, message in self.messages(start_ns, end_ns):
+            if speed:
+                if first is None:
+                    first, t0 = ts, time.perf_counter()
+                delay = (ts - first) / 1e9 / speed - (time.perf_counter() - t0)
+                if delay > 0:
+                    time.sleep(delay)
+            handler(message)
+            n += 1
+        return n
+
+
+if __name__ == "__main__":
+    import sys
+
+    reader = CaptureReader(sys.argv[1])
+    span = reader.time_range()
+    if span is None:
+        print("Empty capture")
+    else:
+        n = sum(1 for _ in reader.messages(decode=False))
+        start, end = (datetime.fromtimestamp(t / 1e9) for t in span)
+        print(f"{sys.argv[1]}: {n} messages in {len(reader.index)} blocks, {start} → {end}")
@@ -0,0 +1,131 @@
+"""Headless, downsampled chart rendering.
+
+Series are reduced to at most `max_points` before they reach matplotlib,
+using LTTB (largest-triangle-three-buckets, keeps the visual shape of
+smooth curves like equity) or min/max bucketing (keeps every spike,
+better for raw prices). Figures are drawn on the Agg canvas without
+pyplot, so nothing needs a display and nothing blocks; the file type
+follows the extension (.png, .svg, .pdf). render_many() draws a batch
+of charts on a process pool.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+MAX_POINTS = 2000
+
+
+# ---------- Downsampling -------------
+def lttb(x, y, n_out):
+    """Indices of the LTTB-selected points (always keeps first and last)."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0] = 0
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third vertex.
+        if i + 2 < len(edges):
+            nxt = slice(edges[i + 1], edges[i + 2])
+            cx, cy = x[nxt].mean(), y[nxt].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+        bx, by = x[start:end], y[start:end]
+        area = np.abs((x[a] - cx) * (by - y[a]) - (x[a] - bx) * (cy - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    keep[-1] = n - 1
+    return keep
+
+
+def minmax(y, n_out):
+    """Indices of each bucket's min and max, in order (plus first and last)."""
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    buckets = (n_out - 2) // 2  # two points per bucket, plus first and last
+    size = -(-n // buckets)  # ceil
+    padded = np.pad(y, (0, buckets * size - n), mode="edge").reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    idx = np.concatenate(
+        [offsets + padded.argmin(axis=1), offsets + padded.argmax(axis=1), [0, n - 1]]
+    )
+    return np.unique(np.minimum(idx, n - 1))
+
+
+def downsample(x, y, max_points=MAX_POINTS, method="lttb"):
+    x = np.arange(len(y)) if x is None else np.asarray(x)
+    y = np.asarray(y)
+    if len(y) <= max_points:
+        return x, y
+    idx = lttb(x, y, max_points) if method == "lttb" else minmax(y, max_points)
+    return x[idx], y[idx]
+
+
+# ---------- Charts -------------
+def _save(fig, path):
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    FigureCanvasAgg(fig)
+    fig.savefig(path, dpi=100)
+    return path
+
+
+def equity_chart(path, equity, title="Equity Curve", xlabel="Trade Number",
+                 ylabel="Cumulative PnL", max_points=MAX_POINTS, color=None):
+    x, y = downsample(None, equity, max_points, "lttb")
+    fig = Figure(figsize=(12, 6))
+    ax = fig.add_subplot()
+    ax.plot(x, y, color=color)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.grid(True)
+    fig.tight_layout()
+    return _save(fig, path)
+
+
+def price_chart(path, times, prices, entries=None, exits=None, title="Price",
+                max_points=MAX_POINTS):
+    """Price line with optional (times, prices) entry/exit markers."""
+    x, y = downsample(times, prices, max_points, "minmax")
+    fig = Figure(figsize=(14, 6))
+    ax = fig.add_subplot()
+    ax.plot(x, y, linewidth=0.8, color="steelblue")
+    if entries is not None and len(entries[0]):
+        ax.scatter(entries[0], entries[1], marker="^", color="green", s=25, label="entry", zorder=3)
+    if exits is not None and len(exits[0]):
+        ax.scatter(exits[0], exits[1], marker="v", color="red", s=25, label="exit", zorder=3)
+    if entries is not None or exits is not None:
+        ax.legend()
+    ax.set_title(title)
+    ax.grid(True)
+    fig.tight_layout()
+    return _save(fig, path)
+
+
+CHARTS = {"equity": equity_chart, "price": price_chart}
+
+
+def _render(job):
+    job = dict(job)
+    return CHARTS[job.pop("kind")](**job)
+
+
+def render_many(jobs, workers=None):
+    """Render [{"kind": "equity"|"price", "path": ..., ...}, ...] in parallel."""
+    jobs = list(jobs)
+    if workers == 1 or len(jobs) <= 1:
+        return [_render(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_render, jobs))
@@ -0,0 +1,77 @@
+"""Check that the bar kernel agrees with the reference backtest loop.
+
+For each day file, the default fill model must give the same trades from
+run_backtest_loop, the list (pure Python) kernel and, when Numba is
+installed, the compiled kernel. The other fill models have no loop
+equivalent, so for those the two kernel paths are compared with each
+other. Prices are compared exactly: both paths do the same float64
+arithmetic.
+
+    python check_kernel.py data/MNQ_1s_10.29.2025.csv ...
+"""
+import glob
+import sys
+import time
+
+import pandas as pd
+
+from backtest import TICK_SIZE, read_day, run_backtest, run_backtest_loop
+from bt_kernel import HAVE_NUMBA, FillModel
+from mean_reversion import MeanReversion
+
+FILLS = [
+    FillModel(),
+    FillModel(intrabar="pessimistic"),
+    FillModel(intrabar="nearest"),
+    FillModel("next_open", slippage_ticks=1),
+]
+
+
+def _same(a, b):
+    if a.empty or b.empty:
+        return a.empty and b.empty
+    return a.equals(b)
+
+
+def check(df, strategy):
+    failures = []
+    t0 = time.perf_counter()
+    reference = run_backtest_loop(df, strategy)
+    loop_secs = time.perf_counter() - t0
+
+    for fill in FILLS:
+        t0 = time.perf_counter()
+        listed = run_backtest(df, strategy, fill=fill, use_jit=False)
+        list_secs = time.perf_counter() - t0
+        line = f"  {fill!r}: {len(listed)} trades, list {list_secs:.2f}s"
+        if fill.intrabar == "optimistic" and fill.entry == "close" and not fill.slippage_ticks:
+            line += f", loop {loop_secs:.2f}s"
+            if not _same(listed, reference):
+                failures.append(f"list kernel != loop for {fill!r}")
+        if HAVE_NUMBA:
+            run_backtest(df, strategy, fill=fill)  # compile outside the timing
+            t0 = time.perf_counter()
+            jitted = run_backtest(df, strategy, fill=fill)
+            line += f", jit {time.perf_counter() - t0:.3f}s"
+            if not _same(jitted, listed):
+                failures.append(f"jit kernel != list kernel for {fill!r}")
+        print(line)
+    return failures
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or sorted(glob.glob("data/*.csv"))[:1]
+    strategy = MeanReversion(
+        lookback=120, threshold_factor=0.00075, stop_ticks=50, tick_size=TICK_SIZE
+    )
+    if not HAVE_NUMBA:
+        print("⚠️ numba not installed: only the list kernel is checked")
+    failures = []
+    for path in paths:
+        print(path)
+        failures += [f"{path}: {f}" for f in check(read_day(path), strategy)]
+    for f in failures:
+        print("❌", f)
+    if failures:
+        sys.exit(1)
+    print("✅ kernel paths agree")
@@ -0,0 +1,236 @@
+"""Single-pass validation and repair for the recorded 1s bar files in data/.
+
+Each file is streamed once, line by line. Per file the report covers:
+header presence, malformed rows, duplicate and out-of-order timestamps,
+gaps (count, missing seconds, largest), zero-volume runs and OHLC rows
+whose high/low don't contain the open/close.
+
+Repair (in place via tmp + rename, or to a separate directory) writes a
+header, drops malformed, duplicate and out-of-order rows (a lone row
+stamped ahead of its neighbours is dropped, not the rows after it), widens
+high/low to contain open/close, and copies every other line through
+untouched. Running it on a clean file is a no-op, so it is safe to
+re-run.
+
+    python data_quality.py                 # report on data/*.csv
+    python data_quality.py --repair        # fix in place
+    python data_quality.py --out clean/    # write clean copies
+"""
+import glob
+import json
+import os
+
+HEADER = "time,open,high,low,close,volume"
+ZERO_VOLUME_RUN = 60  # seconds of zero volume worth reporting
+TOP_GAPS = 5
+
+
+def scan(path, out=None, zero_run=ZERO_VOLUME_RUN):
+    """Validate `path`; if `out` is a writable file, write the repaired rows there."""
+    report = {
+        "file": path,
+        "header": False,
+        "rows": 0,
+        "kept": 0,
+        "malformed": 0,
+        "duplicates": 0,
+        "out_of_order": 0,
+        "ohlc_fixed": 0,
+        "gaps": 0,
+        "missing_secs": 0,
+        "largest_gaps": [],
+        "zero_volume_runs": 0,
+        "longest_zero_run": 0,
+        "first": None,
+        "last": None,
+    }
+    gaps = []
+    prev = None
+    zero_len = 0
+
+    def accept(row):
+        nonlocal prev, zero_len
+        t, parts, stripped = row
+        if prev is not None:
+            if t == prev:
+                report["duplicates"] += 1
+                return
+            if t < prev:
+                report["out_of_order"] += 1
+                return
+            if t - prev > 1:
+                missing = t - prev - 1
+                report["gaps"] += 1
+                report["missing_secs"] += missing
+                gaps.append((missing, prev))
+                if len(gaps) > TOP_GAPS * 4:
+                    gaps.sort(reverse=True)
+                    del gaps[TOP_GAPS:]
+                zero_len = _end_zero_run(report, zero_len, zero_run)
+        prev = t
+        if report["first"] is None:
+            report["first"] = t
+        report["last"] = t
+
+        o, h, l, c, v = (float(p) for p in parts[1:])
+        if v == 0:
+            zero_len += 1
+        else:
+            zero_len = _end_zero_run(report, zero_len, zero_run)
+
+        hi = max(o, h, l, c)
+        lo = min(o, h, l, c)
+        if hi != h or lo != l:
+            report["ohlc_fixed"] += 1
+            stripped = ",".join([parts[0], parts[1], repr(hi), repr(lo), parts[4], parts[5]])
+        if out is not None:
+            out.write(stripped + "\n")
+        report["kept"] += 1
+
+    if out is not None:
+        out.write(HEADER + "\n")
+
+    # Rows are accepted one behind the read position: a row whose time is
+    # ahead of the row after it (while that one still follows the last kept
+    # row) is a corrupt outlier and is dropped on its own, instead of making
+    # every good row after it look out of order. Before anything is kept
+    # there is no last row to compare with, so if the first two rows are
+    # out of order the third decides which of them is the outlier.
+    pending = None
+    held = None
+    with open(path, newline="") as f:
+        for lineno, line in enumerate(f):
+            stripped = line.strip()
+            if not stripped:
+                continue
+            if lineno == 0 and not stripped[0].isdigit():
+                report["header"] = True
+                continue
+            report["rows"] += 1
+
+            parts = stripped.split(",")
+            try:
+                if len(parts) != 6:
+                    raise ValueError
+                t = int(float(parts[0]))
+                o, h, l, c, v = (float(p) for p in parts[1:])
+            except ValueError:
+                report["malformed"] += 1
+                continue
+            if min(o, h, l, c) <= 0 or v < 0:
+                report["malformed"] += 1
+                continue
+
+            row = (t, parts, stripped)
+            if held is not None:
+                # First two rows disagree: the third says which one is off.
+                first, second = pending, held
+                held = None
+                if second[0] < t <= first[0]:
+                    report["out_of_order"] += 1  # first row stamped ahead
+                    accept(second)
+                else:
+                    accept(first)
+                    report["out_of_order"] += 1  # second row stamped behind
+            elif pending is not None:
+                if t < pending[0]:
+                    if prev is None:
+                        held = row
+                        continue
+                    if t > prev:
+                        report["out_of_order"] += 1
+                    else:
+                        accept(pending)
+                else:
+                    accept(pending)
+            pending = row
+    if held is not None:
+        accept(pending)
+        report["out_of_order"] += 1
+    elif pending is not None:
+        accept(pending)
+
+    _end_zero_run(report, zero_len, zero_run)
+    gaps.sort(reverse=True)
+    report["largest_gaps"] = [{"after": t, "secs": s} for s, t in gaps[:TOP_GAPS]]
+    report["clean"] = report["header"] and not (
+        report["malformed"] or report["duplicates"] or report["out_of_order"] or report["ohlc_fixed"]
+    )
+    return report
+
+
+def _end_zero_run(report, length, min_run):
+    if length >= min_run:
+        report["zero_volume_runs"] += 1
+    if length > report["longest_zero_run"]:
+        report["longest_zero_run"] = length
+    return 0
+
+
+def repair(path, out_dir=None):
+    """Write a clean copy of `path` (in place unless `out_dir` is given).
+
+    The file is read once: the repaired rows go to a temp file as it is
+    scanned, which replaces the original only if something needed fixing.
+    """
+    if out_dir is None:
+        dest = path
+    else:
+        os.makedirs(out_dir, exist_ok=True)
+        dest = os.path.join(out_dir, os.path.basename(path))
+    tmp = dest + ".tmp"
+    with open(tmp, "w", newline="") as out:
+        report = scan(path, out)
+        out.flush()
+        os.fsync(out.fileno())
+    if out_dir is None and report["clean"]:
+        os.remove(tmp)  # nothing to fix; leave the file alone
+        return report
+    os.replace(tmp, dest)
+    report["written"] = dest
+    return report
+
+
+def print_report(report):
+    span = (report["last"] - report["first"] + 1) if report["first"] is not None else 0
+    print(
+        f"{os.path.basename(report['file'])}: {report['rows']} rows, kept {report['kept']}"
+        f"{'' if report['header'] else ' (no header)'}"
+    )
+    print(
+        f"  dup {report['duplicates']}, out-of-order {report['out_of_order']}, "
+        f"malformed {report['malformed']}, ohlc fixed {report['ohlc_fixed']}"
+    )
+    coverage = 100.0 * report["kept"] / span if span else 0.0
+    print(
+        f"  gaps {report['gaps']} ({report['missing_secs']}s missing, {coverage:.1f}% coverage), "
+        f"zero-volume runs ≥{ZERO_VOLUME_RUN}s: {report['zero_volume_runs']} "
+        f"(longest {report['longest_zero_run']}s)"
+    )
+    for g in report["largest_gaps"][:3]:
+        print(f"    gap of {g['secs']}s after t={g['after']}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Validate / repair 1s bar CSVs")
+    parser.add_argument("paths", nargs="*", default=None)
+    parser.add_argument("--repair", action="store_true", help="fix files in place")
+    parser.add_argument("--out", help="write clean copies to this directory")
+    parser.add_argument("--report", help="write the reports as JSON here")
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(glob.glob("data/*.csv"))
+    reports = []
+    for path in paths:
+        if args.repair or args.out:
+            report = repair(path, args.out)
+        else:
+            report = scan(path)
+        print_report(report)
+        reports.append(report)
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(reports, f, indent=2)
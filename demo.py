@@ -12,6 +12,7 @@ import csv
 import os
 import numpy as np
 from zoneinfo import ZoneInfo
+from mean_reversion import MeanReversion
 
 
 DATA_GATHER_FILE = "data/MNQ_1s_10.29.2025.csv"
@@ -35,6 +36,8 @@ peak_equity = 0
 trading_paused = False
 num_contracts = 1
 
+MODEL = MeanReversion(lookback=120, threshold_factor=0.00075, stop_ticks=TICKS)
+
 
 tick_q = queue.Queue()
 bar_q = queue.Queue()
@@ -229,8 +232,8 @@ from collections import deque
 def strategy(rest, bar):
     if not hasattr(strategy, "active_order_id"):
         strategy.active_order_id = None
-    if not hasattr(strategy, "closes"):
-        strategy.closes = deque(maxlen=120)
+    if not hasattr(strategy, "state"):
+        strategy.state = MODEL.new_state()
 
     balance = rest.get_balance()
 
@@ -238,20 +241,11 @@ def strategy(rest, bar):
         print("no soup for you.......")
         return None
 
-    strategy.closes.append(bar["close"])
-
-    # if len(strategy.closes) < 120:
-    #     print("wait for it....")
-    #     return None
-
-    closes = np.array(strategy.closes)
-    mean_close = closes.mean()
-    current_close = closes[-1]
-
-    threshold = 0.00075 * mean_close
-
     open_orders = rest.get_open_orders()
 
+    strategy.state["position"] = "BUY" if open_orders else None
+    signal = MODEL.on_bar(bar, strategy.state)
+
     if len(open_orders) > 0:
         pos = open_orders[0]
         pl = pos["unrealizedPL"]
@@ -262,30 +256,19 @@ def strategy(rest, bar):
             rest.cancel_order(strategy.active_order_id)
         return None
 
-    strategy.active_order_id = rest.place_order(
-        SYMBOL,
-        "BUY",
-        num_contracts,
-        "MARKET",
-    )
-    # now = datetime.now(ZoneInfo("America/New_York"))
-    # stop_dt = datetime(2025, 10, 29, 16, 0, tzinfo=ZoneInfo("America/New_York"))
-
-    # if now >= stop_dt:
-    #     print(
-    #         "🛑 Market closed for the day — stopping trading after Oct 29, 2025 4:00 PM ET."
-    #     )
-    #     return None
-
-    # if current_close < mean_close - threshold:
-    #     rest.place_order(
-    #         SYMBOL,
-    #         "BUY",
-    #         num_contracts,
-    #         "MARKET",
-    #     )
-
-    # return None
+    if not MODEL.is_warm(strategy.state):
+        print("wait for it....")
+        return None
+
+    if signal is not None:
+        strategy.active_order_id = rest.place_order(
+            SYMBOL,
+            signal["side"],
+            num_contracts,
+            "MARKET",
+        )
+
+    return None
 
 
 strategy.ranges = deque(maxlen=20)
@@ -0,0 +1,245 @@
+import threading
+import time
+
+import numpy as np
+
+from fastlog import get_logger
+from ingest import IngestStage, OVERLOAD_BLOCK
+from spsc import SpscQueue
+from stream_codec import Trade
+from tick_buffer import TickBuffer
+
+log = get_logger("engine")
+
+
+# ---------- Per-symbol Aggregator -------------
+class BarAggregator:
+    """1s OHLCV state for one symbol."""
+
+    def __init__(self, symbol, index, trade_only=True):
+        self.symbol = symbol
+        self.index = index
+        self.trade_only = trade_only
+        self.o = self.h = self.l = self.c = None
+        self.vol = 0
+        self.last_bar = None
+
+    def update(self, prices, sizes):
+        if not prices.size:
+            return
+        if self.o is None:
+            self.o = float(prices[0])
+        hi = float(prices.max())
+        lo = float(prices.min())
+        self.h = hi if self.h is None else max(self.h, hi)
+        self.l = lo if self.l is None else min(self.l, lo)
+        self.c = float(prices[-1])
+        self.vol += float(sizes.sum())
+
+    def close(self, t):
+        """Close the bar for second `t`; None until the first tick is seen."""
+        if self.c is None:
+            return None
+        bar = {
+            "t": t,
+            "open": self.o,
+            "high": self.h,
+            "low": self.l,
+            "close": self.c,
+            "volume": self.vol,
+        }
+        self.last_bar = bar
+        self.o = self.h = self.l = self.c
+        self.vol = 0
+        return bar
+
+    def resume(self, backfill, now_sec):
+        """Rebuild the seconds missed during an outage, oldest first."""
+        if self.last_bar is None:
+            return []
+        bars = backfill.fill(self.symbol, self.last_bar, now_sec) if backfill else []
+        if bars:
+            self.last_bar = bars[-1]
+        self.o = self.h = self.l = self.c = self.last_bar["close"]
+        self.vol = 0
+        return bars
+
+
+class Shard:
+    """A group of symbols sharing one tick ring, bar thread and trade thread."""
+
+    def __init__(self, index, overload=OVERLOAD_BLOCK):
+        self.index = index
+        self.aggregators = []
+        self.ticks = TickBuffer()
+        self.ingest = IngestStage(self.ticks, overload)
+        self.bars = SpscQueue(1024)
+        self.in_outage = False
+
+
+# ---------- Multi-symbol Engine -------------
+class MultiSymbolEngine:
+    """Routes stream records by exchSym to per-symbol aggregators and strategies.
+
+    Symbols are dealt round-robin onto `workers` shards. Each shard has its
+    own tick ring and bar queue, and runs one aggregator thread and one
+    strategy thread, so a slow REST call for one symbol only holds up the
+    symbols on its own shard.
+    """
+
+    def __init__(
+        self,
+        symbols,
+        on_bar,
+        stream,
+        backfill=None,
+        recorder=None,
+        workers=2,
+        trade_only=True,
+        overload=OVERLOAD_BLOCK,
+    ):
+        self.symbols = list(symbols)
+        self.on_bar = on_bar
+        self.stream = stream
+        self.backfill = backfill
+        self.recorder = recorder
+        self.trade_only = trade_only
+        self.states = {sym: {} for sym in self.symbols}
+        n_shards = max(1, min(workers, len(self.symbols)))
+        self.shards = [Shard(i, overload) for i in range(n_shards)]
+        self._routes = {}
+        for i, sym in enumerate(self.symbols):
+            shard = self.shards[i % len(self.shards)]
+            agg = BarAggregator(sym, len(shard.aggregators), trade_only)
+            shard.aggregators.append(agg)
+            self._routes[sym] = (shard.ingest, agg.index)
+        # Records without an exchSym can only belong to a lone symbol.
+        self._default = self._routes[self.symbols[0]] if len(self.symbols) == 1 else None
+
+    # Called on the WebSocket thread.
+    def route(self, records):
+        if not records:
+            return
+        if type(records[0]) is Trade:
+            push = IngestStage.push_trades
+        elif self.trade_only:
+            return
+        else:
+            push = IngestStage.push_quotes
+
+        first = records[0].sym
+        if records[-1].sym == first and all(r.sym == first for r in records):
+            target = self._routes.get(first, self._default)
+            if target is not None:
+                push(target[0], records, target[1])
+            return
+
+        groups = {}
+        for r in records:
+            groups.setdefault(r.sym, []).append(r)
+        for sym, group in groups.items():
+            target = self._routes.get(sym, self._default)
+            if target is not None:
+                push(target[0], group, target[1])
+
+    def seed(self, symbol, bars):
+        """Continue from previously recorded bars (e.g. after a restart).
+
+        The first live tick then backfills from the last seeded bar, the
+        same way it does after an outage.
+        """
+        shard_ingest, index = self._routes[symbol]
+        for shard in self.shards:
+            if shard.ingest is shard_ingest:
+                agg = shard.aggregators[index]
+                agg.last_bar = bars[-1]
+                agg.o = agg.h = agg.l = agg.c = bars[-1]["close"]
+
+    def stats(self):
+        return {f"shard{s.index}": s.ingest.stats() for s in self.shards}
+
+    def start(self, stop_event):
+        for shard in self.shards:
+            threading.Thread(
+                target=self._bar_loop, args=(shard, stop_event), daemon=True
+            ).start()
+            threading.Thread(
+                target=self._trade_loop, args=(shard, stop_event), daemon=True
+            ).start()
+
+    def _publish(self, shard, agg, bar):
+        shard.bars.put((agg.symbol, bar))
+        if self.recorder is not None:
+            self.recorder(agg.symbol, bar)
+
+    def _bar_loop(self, shard, stop_event):
+        current_sec = int(time.time())
+
+        while not stop_event.is_set():
+            # Sleep until ticks arrive or the current second closes.
+            shard.ticks.wait(timeout=max(0.0, current_sec + 1 - time.time()))
+
+            if shard.in_outage and not self.stream.awaiting_tick:
+                # Stream is back: splice the missed seconds in before live ticks.
+                current_sec = int(time.time())
+                for agg in shard.aggregators:
+                    for bar in agg.resume(self.backfill, current_sec):
+                        self._publish(shard, agg, bar)
+                shard.in_outage = False
+
+            ticks, spilled = shard.ingest.drain()
+            if ticks.price.size:
+                keep = ~np.isnan(ticks.price)
+                single = len(shard.aggregators) == 1
+                for agg in shard.aggregators:
+                    mask = keep if single else keep & (ticks.sym == agg.index)
+                    agg.update(ticks.price[mask], ticks.size[mask])
+            # Trades parked on overload come after everything in the ring.
+            for records, sym in spilled:
+                trades = [t for t in records if t.price is not None]
+                shard.aggregators[sym].update(
+                    np.array([t.price for t in trades], dtype=np.float64),
+                    np.array([t.size or 0 for t in trades], dtype=np.float64),
+                )
+
+            if not self.trade_only:
+                # Fold in the latest conflated quote for each symbol.
+                for agg in shard.aggregators:
+                    q = shard.ingest.take_quote(agg.index)
+                    if q is not None and q.bid is not None and q.ask is not None:
+                        agg.update(
+                            np.array([(q.bid + q.ask) / 2.0]),
+                            np.array([((q.bid_size or 0) + (q.ask_size or 0)) / 2.0]),
+                        )
+
+            now_sec = int(time.time())
+            if now_sec > current_sec:
+                if self.stream.awaiting_tick and any(
+                    agg.last_bar is not None for agg in shard.aggregators
+                ):
+                    # Don't stamp stale flat bars while the stream is down;
+                    # these seconds get backfilled once it reconnects. The
+                    # second the outage started in still had live ticks.
+                    if not shard.in_outage:
+                        for agg in shard.aggregators:
+                            bar = agg.close(current_sec)
+                            if bar is not None:
+                                self._publish(shard, agg, bar)
+                    shard.in_outage = True
+                else:
+                    for agg in shard.aggregators:
+                        bar = agg.close(current_sec)
+                        if bar is not None:
+                            self._publish(shard, agg, bar)
+                current_sec = now_sec
+
+    def _trade_loop(self, shard, stop_event):
+        while not stop_event.is_set():
+            if not shard.bars.wait(timeout=1):
+                continue
+
+            for symbol, bar in shard.bars.get_many():
+                try:
+                    self.on_bar(symbol, bar, self.states[symbol])
+                except Exception as e:
+                    log.error("Strategy error on %s: %r", symbol, e, every=1.0)
@@ -0,0 +1,205 @@
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from fastlog import get_logger
+
+log = get_logger("exits")
+
+# Order statuses the broker uses for an order it did not accept.
+REJECTED_STATUSES = {"ERROR", "REJECTED", "FAILED", "CANCELLED", "EXPIRED"}
+
+Bracket = namedtuple(
+    "Bracket", ["symbol", "side", "qty", "entry", "stop", "target", "key", "opened_at"]
+)
+
+
+class ExitManager:
+    """Local one-cancels-other stop/target per open position.
+
+    Every trade tick is checked against the bracket for its symbol with a
+    dict lookup and the strategy's on_tick(price, trade) rule. The first
+    tick through either level pops the bracket and sends the closing market order on a
+    dedicated order thread, so each bracket fires at most once; a key that
+    has already fired is never armed again.
+
+    on_exit only runs for exits the broker accepted, so risk and stats
+    never book an exit that didn't happen. A rejected exit is re-armed
+    under a new key but held for `retry_backoff` seconds (doubling each
+    time) before the next tick may fire it. If the send itself fails
+    (timeout, connection error) the order may still have filled, so
+    `position_open(symbol)` asks the broker first: flat means it filled,
+    open means retry, None (unknown) or `max_retries` failed attempts
+    leave the position to a human and call on_give_up(bracket, reason).
+    """
+
+    def __init__(self, send_exit, on_tick, on_exit=None, on_change=None, sync=False,
+                 position_open=None, on_give_up=None, max_retries=3, retry_backoff=1.0):
+        self.send_exit = send_exit  # send_exit(symbol, side, qty)
+        self.on_tick = on_tick  # strategy.on_tick(price, trade) -> "STOP"/"TARGET"/None
+        self.on_exit = on_exit  # on_exit(bracket, price, reason, response)
+        self.on_change = on_change  # on_change(list of armed bracket dicts)
+        self.position_open = position_open  # position_open(symbol) -> True/False/None
+        self.on_give_up = on_give_up  # on_give_up(bracket, reason)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._brackets = {}
+        self._levels = {}  # symbol -> {"side", "stop", "target"} for on_tick
+        self._fired = set()
+        self._attempts = {}  # symbol -> failed exit attempts for the open position
+        self._hold = {}  # symbol -> monotonic time before which a re-armed exit waits
+        self.retries = 0  # exits re-armed after a rejected/failed order
+        self.gave_up = 0
+        self._lock = threading.Lock()
+        self.sync = sync  # send exits inline (paper trading / replay)
+        self._orders = ThreadPoolExecutor(max_workers=1, thread_name_prefix="exit-orders")
+
+    def arm(self, symbol, side, qty, entry, stop, target, key=None, opened_at=None):
+        key = key or f"{symbol}:{entry}:{time.time_ns()}"
+        opened_at = opened_at or time.time()
+        bracket = Bracket(symbol, side.upper(), qty, entry, stop, target, key, opened_at)
+        with self._lock:
+            if key in self._fired:
+                return None
+            self._brackets[symbol] = bracket
+            self._levels[symbol] = bracket._asdict()
+        self._changed()
+        log.info("🎯 Armed %s %s @ %s: stop %s / target %s", side, symbol, entry, stop, target)
+        return bracket
+
+    def disarm(self, symbol):
+        with self._lock:
+            bracket = self._brackets.pop(symbol, None)
+            self._levels.pop(symbol, None)
+        if bracket is not None:
+            self._changed()
+        return bracket
+
+    def brackets(self):
+        return [b._asdict() for b in list(self._brackets.values())]
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change(self.brackets())
+
+    def is_armed(self, symbol):
+        return symbol in self._brackets
+
+    def get(self, symbol):
+        return self._brackets.get(symbol)
+
+    # Called on the WebSocket thread for every trade message.
+    def on_trades(self, records):
+        brackets = self._brackets
+        if not brackets:
+            return
+        for r in records:
+            b = brackets.get(r.sym)
+            if b is None or r.price is None:
+                continue
+            levels = self._levels.get(r.sym)
+            reason = levels is not None and self.on_tick(r.price, levels)
+            if reason:
+                self._fire(b, r.price, reason)
+
+    # Called on the WebSocket thread after a quote moves a book.
+    def on_book(self, book):
+        b = self._brackets.get(book.symbol)
+        if b is None:
+            return
+        # Check the side a closing market order would fill against.
+        p = book.bid if b.side == "BUY" else book.ask
+        levels = self._levels.get(book.symbol)
+        if p is None or levels is None:
+            return
+        reason = self.on_tick(p, levels)
+        if reason:
+            self._fire(b, p, reason)
+
+    def _fire(self, bracket, price, reason):
+        if self._hold and time.monotonic() < self._hold.get(bracket.symbol, 0.0):
+            return  # backing off after a failed exit
+        with self._lock:
+            if self._brackets.get(bracket.symbol) is not bracket:
+                return
+            del self._brackets[bracket.symbol]
+            self._levels.pop(bracket.symbol, None)
+            self._fired.add(bracket.key)
+        if self.sync:
+            self._send(bracket, price, reason)
+            self._changed()
+            return
+        self._orders.submit(self._send, bracket, price, reason)
+        if self.on_change is not None:
+            self._orders.submit(self._changed)
+
+    @staticmethod
+    def rejected(resp):
+        """True unless `resp` is an order the broker accepted."""
+        if not isinstance(resp, dict) or "error" in resp:
+            return True
+        return str(resp.get("status") or "").upper() in REJECTED_STATUSES
+
+    def _send(self, bracket, price, reason):
+        symbol = bracket.symbol
+        side = "SELL" if bracket.side == "BUY" else "BUY"
+        try:
+            resp = self.send_exit(symbol, side, bracket.qty)
+        except Exception as e:
+            # The order may have reached the broker; only the position can tell.
+            resp = {"error": repr(e)}
+            still_open = self.position_open(symbol) if self.position_open else None
+            if still_open is None:
+                log.error("❌ %s exit for %s: send failed and position unknown: %s",
+                          reason, symbol, resp)
+                self._give_up(bracket, f"exit send failed, position unknown ({e!r})")
+                return
+            if not still_open:
+                log.warning("⚠️ %s exit for %s: send failed but position is flat", reason, symbol)
+                self._exited(bracket, price, reason, resp)
+                return
+        else:
+            if not self.rejected(resp):
+                self._exited(bracket, price, reason, resp)
+                return
+
+        attempts = self._attempts.get(symbol, 0) + 1
+        self._attempts[symbol] = attempts
+        if attempts >= self.max_retries:
+            log.error("❌ %s exit for %s failed %d times: %s", reason, symbol, attempts, resp)
+            self._give_up(bracket, f"exit failed {attempts}x: {resp}")
+            return
+        delay = self.retry_backoff * 2 ** (attempts - 1)
+        log.error("❌ %s exit for %s failed, retrying in %.1fs: %s", reason, symbol, delay, resp)
+        self._hold[symbol] = time.monotonic() + delay
+        self._rearm(bracket)
+
+    def _exited(self, bracket, price, reason, resp):
+        self._attempts.pop(bracket.symbol, None)
+        self._hold.pop(bracket.symbol, None)
+        log.info("🚪 %s %s @ %s → %s", reason, bracket.symbol, price, resp)
+        if self.on_exit is not None:
+            self.on_exit(bracket, price, reason, resp)
+
+    def _give_up(self, bracket, why):
+        self.gave_up += 1
+        self._attempts.pop(bracket.symbol, None)
+        self._hold.pop(bracket.symbol, None)
+        if self.on_give_up is not None:
+            self.on_give_up(bracket, why)
+
+    def _rearm(self, bracket):
+        self.retries += 1
+        with self._lock:
+            if bracket.symbol in self._brackets:
+                return  # armed again meanwhile (e.g. position re-bracketed)
+            key = f"{bracket.key}#{self.retries}"
+            bracket = bracket._replace(key=key)
+            self._brackets[bracket.symbol] = bracket
+            self._levels[bracket.symbol] = bracket._asdict()
+        self._changed()
+
+    def close(self):
+        """Wait for in-flight exit orders to finish."""
+        self._orders.shutdown(wait=True)
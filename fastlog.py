@@ -0,0 +1,230 @@
+"""Asynchronous structured logging for the live engine.
+
+Logging from a hot thread costs one level check and one deque.append():
+records go into a bounded in-memory ring (collections.deque appends are
+atomic, so producers take no lock) and a background writer formats them
+and does the actual I/O. Formatting of printf-style args is deferred to
+the writer as well.
+
+    log = get_logger("ws")
+    log.warning("Bad WS message: %s", message, every=1.0)
+
+Levels are per component (set_level("bars", "DEBUG")). `every` rate
+limits a message template: at most one record per `every` seconds gets
+through, and the next one that does reports how many were suppressed.
+Records are written as text to stdout and, if configured, as JSON lines
+to a file.
+"""
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+_LEVELS = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "ERROR": ERROR}
+_NAMES = {v: k for k, v in _LEVELS.items()}
+
+
+def _level(level):
+    return _LEVELS[level.upper()] if isinstance(level, str) else int(level)
+
+
+# ---------- Writer -------------
+class LogWriter:
+    """Owns the ring and the thread that drains it."""
+
+    def __init__(self, capacity=65536, stream=None, path=None, interval=0.05):
+        self.ring = deque(maxlen=capacity)
+        self.capacity = capacity
+        self.stream = stream if stream is not None else sys.stdout
+        self.path = path
+        self.interval = interval
+        self.written = 0
+        self.overwritten = 0
+        self._file = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._io_lock = threading.Lock()
+
+    def configure(self, path=None, stream=None):
+        with self._io_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self.path = path
+            if stream is not None:
+                self.stream = stream
+
+    def put(self, record):
+        ring = self.ring
+        if len(ring) >= self.capacity:
+            self.overwritten += 1  # oldest record is about to fall off
+        ring.append(record)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True, name="log-writer")
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        ring = self.ring
+        if not ring:
+            return
+        with self._io_lock:
+            text = []
+            lines = []
+            while True:
+                try:
+                    ts, level, component, msg, args, fields = ring.popleft()
+                except IndexError:
+                    break
+                if args:
+                    try:
+                        msg = msg % args
+                    except (TypeError, ValueError):
+                        msg = " ".join([msg] + [str(a) for a in args])
+                text.append(self._format(ts, level, component, msg, fields))
+                if self.path:
+                    lines.append(self._json(ts, level, component, msg, fields))
+            if self.overwritten:
+                text.append(f"⚠️ log ring overflowed, {self.overwritten} records lost")
+                self.overwritten = 0
+            self.stream.write("\n".join(text) + "\n")
+            self.stream.flush()
+            if lines:
+                if self._file is None:
+                    folder = os.path.dirname(self.path)
+                    if folder:
+                        os.makedirs(folder, exist_ok=True)
+                    self._file = open(self.path, "a", encoding="utf-8")
+                self._file.write("\n".join(lines) + "\n")
+                self._file.flush()
+            self.written += len(text)
+
+    @staticmethod
+    def _format(ts, level, component, msg, fields):
+        stamp = time.strftime("%H:%M:%S", time.localtime(ts)) + f".{int(ts % 1 * 1000):03d}"
+        line = f"{stamp} {_NAMES.get(level, level):<7} [{component}] {msg}"
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return line
+
+    @staticmethod
+    def _json(ts, level, component, msg, fields):
+        record = {"ts": ts, "level": _NAMES.get(level, level), "component": component, "msg": msg}
+        if fields:
+            record.update(fields)
+        return json.dumps(record, default=str)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.flush()
+        with self._io_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+WRITER = LogWriter()
+atexit.register(WRITER.stop)
+
+
+# ---------- Loggers -------------
+class Logger:
+    __slots__ = ("component", "level", "writer", "_limits")
+
+    def __init__(self, component, level=INFO, writer=WRITER):
+        self.component = component
+        self.level = level
+        self.writer = writer
+        self._limits = {}  # template -> [next allowed time, suppressed]
+
+    def enabled(self, level):
+        return level >= self.level
+
+    def log(self, level, msg, *args, every=None, **fields):
+        if level < self.level:
+            return
+        now = time.time()
+        if every is not None:
+            limit = self._limits.get(msg)
+            if limit is not None:
+                if now < limit[0]:
+                    limit[1] += 1
+                    return
+                if limit[1]:
+                    fields["suppressed"] = limit[1]
+                limit[0] = now + every
+                limit[1] = 0
+            else:
+                self._limits[msg] = [now + every, 0]
+        self.writer.put((now, level, self.component, msg, args, fields))
+
+    def debug(self, msg, *args, **kw):
+        if DEBUG >= self.level:
+            self.log(DEBUG, msg, *args, **kw)
+
+    def info(self, msg, *args, **kw):
+        if INFO >= self.level:
+            self.log(INFO, msg, *args, **kw)
+
+    def warning(self, msg, *args, **kw):
+        self.log(WARNING, msg, *args, **kw)
+
+    def error(self, msg, *args, **kw):
+        self.log(ERROR, msg, *args, **kw)
+
+
+_loggers = {}
+_component_levels = {}
+_default_level = INFO
+
+
+def get_logger(component):
+    logger = _loggers.get(component)
+    if logger is None:
+        level = _component_levels.get(component, _default_level)
+        logger = _loggers.setdefault(component, Logger(component, level))
+        WRITER.start()
+    return logger
+
+
+def set_level(component, level):
+    level = _level(level)
+    _component_levels[component] = level
+    if component in _loggers:
+        _loggers[component].level = level
+
+
+def configure(levels=None, default=None, path=None):
+    """Set the default and per-component levels, and the JSON-lines file."""
+    global _default_level
+    if default is not None:
+        _default_level = _level(default)
+        for name, logger in _loggers.items():
+            if name not in _component_levels:
+                logger.level = _default_level
+    for component, level in (levels or {}).items():
+        set_level(component, level)
+    if path is not None:
+        WRITER.configure(path=path)
+
+
+def flush():
+    WRITER.flush()
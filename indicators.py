@@ -0,0 +1,345 @@
+"""Streaming indicators with batch twins that agree bit-for-bit.
+
+Every streaming class does its arithmetic in exactly the order the batch
+function does, so the live path and the backtest see identical floats:
+
+- Rolling sums are differences of one running cumulative sum
+  (cum[t] - cum[t - n]), which is what np.cumsum gives the batch side.
+  Std and z-score sum deviations from the first value rather than raw
+  prices, so the squares stay small.
+- Recursive filters (EMA, Wilder ATR) can't be vectorized without
+  changing the rounding, so their batch forms run the same recurrence
+  over a plain float list.
+- Rolling max/min use monotonic deques when streaming and a sliding
+  window view in batch; both are exact.
+
+Streaming update() returns None until the window is full; batch
+functions return NaN for those leading positions.
+"""
+import math
+from collections import deque
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# ---------- Rolling sum / mean / std -------------
+class RollingSum:
+    def __init__(self, n):
+        self.n = n
+        self.count = 0
+        self.cum = 0.0
+        self._cums = deque([0.0], maxlen=n + 1)
+
+    def update(self, x):
+        self.cum += x
+        self._cums.append(self.cum)
+        self.count += 1
+        if self.count < self.n:
+            return None
+        return self.cum - self._cums[0]
+
+    @property
+    def value(self):
+        if self.count < self.n:
+            return None
+        return self.cum - self._cums[0]
+
+
+def rolling_sum(x, n):
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(len(x), np.nan)
+    if len(x) < n:
+        return out
+    cs = np.cumsum(x)
+    prev = np.concatenate(([0.0], cs[: len(x) - n]))
+    out[n - 1 :] = cs[n - 1 :] - prev
+    return out
+
+
+class RollingMean:
+    def __init__(self, n):
+        self.n = n
+        self._sum = RollingSum(n)
+
+    @property
+    def count(self):
+        return self._sum.count
+
+    def update(self, x):
+        s = self._sum.update(x)
+        return None if s is None else s / self.n
+
+    @property
+    def value(self):
+        s = self._sum.value
+        return None if s is None else s / self.n
+
+
+def rolling_mean(x, n):
+    return rolling_sum(x, n) / n
+
+
+class RollingStd:
+    """Population standard deviation over the last n values.
+
+    Sums run over x - ref (ref = the first value seen), so squaring
+    works on small deviations rather than raw prices and E[d²] - E[d]²
+    doesn't cancel away the precision.
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self.ref = None
+        self._sum = RollingSum(n)
+        self._sumsq = RollingSum(n)
+
+    def update(self, x):
+        if self.ref is None:
+            self.ref = x
+        d = x - self.ref
+        s = self._sum.update(d)
+        sq = self._sumsq.update(d * d)
+        if s is None:
+            return None
+        mean = s / self.n
+        var = sq / self.n - mean * mean
+        return math.sqrt(var) if var > 0.0 else 0.0
+
+
+def _shifted_moments(x, n):
+    """Rolling mean and variance of x - x[0], as RollingStd/ZScore compute them."""
+    d = x - x[0] if len(x) else x
+    mean = rolling_sum(d, n) / n
+    var = rolling_sum(d * d, n) / n - mean * mean
+    return d, mean, var
+
+
+def rolling_std(x, n):
+    x = np.asarray(x, dtype=np.float64)
+    _, _, var = _shifted_moments(x, n)
+    out = np.sqrt(np.where(var > 0.0, var, 0.0))
+    out[np.isnan(var)] = np.nan
+    return out
+
+
+class ZScore:
+    def __init__(self, n):
+        self.n = n
+        self.ref = None
+        self._sum = RollingSum(n)
+        self._sumsq = RollingSum(n)
+
+    def update(self, x):
+        if self.ref is None:
+            self.ref = x
+        d = x - self.ref
+        s = self._sum.update(d)
+        sq = self._sumsq.update(d * d)
+        if s is None:
+            return None
+        mean = s / self.n
+        var = sq / self.n - mean * mean
+        if not var > 0.0:
+            return math.nan
+        return (d - mean) / math.sqrt(var)
+
+
+def zscore(x, n):
+    x = np.asarray(x, dtype=np.float64)
+    d, mean, var = _shifted_moments(x, n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = (d - mean) / np.sqrt(np.where(var > 0.0, var, np.nan))
+    return z
+
+
+# ---------- Recursive filters -------------
+class EMA:
+    """EMA with alpha = 2 / (n + 1), seeded with the mean of the first n values."""
+
+    def __init__(self, n):
+        self.n = n
+        self.alpha = 2.0 / (n + 1)
+        self.value = None
+        self._seed = RollingSum(n)
+
+    def update(self, x):
+        if self.value is None:
+            s = self._seed.update(x)
+            if s is None:
+                return None
+            self.value = s / self.n
+            return self.value
+        self.value = self.value + self.alpha * (x - self.value)
+        return self.value
+
+
+def ema(x, n):
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(len(x), np.nan)
+    if len(x) < n:
+        return out
+    alpha = 2.0 / (n + 1)
+    value = float(rolling_sum(x[:n], n)[-1]) / n
+    out[n - 1] = value
+    vals = x.tolist()
+    for i in range(n, len(vals)):
+        value = value + alpha * (vals[i] - value)
+        out[i] = value
+    return out
+
+
+class ATR:
+    """Wilder's average true range."""
+
+    def __init__(self, n):
+        self.n = n
+        self.value = None
+        self._prev_close = None
+        self._seed = RollingSum(n)
+
+    def update(self, high, low, close):
+        if self._prev_close is None:
+            tr = high - low
+        else:
+            tr = max(high - low, abs(high - self._prev_close), abs(low - self._prev_close))
+        self._prev_close = close
+        if self.value is None:
+            s = self._seed.update(tr)
+            if s is None:
+                return None
+            self.value = s / self.n
+            return self.value
+        self.value = (self.value * (self.n - 1) + tr) / self.n
+        return self.value
+
+
+def true_range(high, low, close):
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    tr = high - low
+    if len(tr) > 1:
+        prev = close[:-1]
+        tr[1:] = np.maximum(
+            tr[1:], np.maximum(np.abs(high[1:] - prev), np.abs(low[1:] - prev))
+        )
+    return tr
+
+
+def atr(high, low, close, n):
+    tr = true_range(high, low, close)
+    out = np.full(len(tr), np.nan)
+    if len(tr) < n:
+        return out
+    value = float(rolling_sum(tr[:n], n)[-1]) / n
+    out[n - 1] = value
+    trs = tr.tolist()
+    for i in range(n, len(trs)):
+        value = (value * (n - 1) + trs[i]) / n
+        out[i] = value
+    return out
+
+
+# ---------- Session VWAP -------------
+class VWAP:
+    """Volume-weighted typical price since the last reset()."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.cum_pv = 0.0
+        self.cum_v = 0.0
+
+    def update(self, high, low, close, volume):
+        typical = (high + low + close) / 3.0
+        self.cum_pv += typical * volume
+        self.cum_v += volume
+        if self.cum_v == 0.0:
+            return None
+        return self.cum_pv / self.cum_v
+
+
+def vwap(high, low, close, volume):
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    volume = np.asarray(volume, dtype=np.float64)
+    typical = (high + low + close) / 3.0
+    cum_pv = np.cumsum(typical * volume)
+    cum_v = np.cumsum(volume)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(cum_v == 0.0, np.nan, cum_pv / cum_v)
+
+
+# ---------- Rolling high / low channel -------------
+class RollingMax:
+    """Max of the last n values via a monotonic deque (amortized O(1))."""
+
+    def __init__(self, n):
+        self.n = n
+        self.count = 0
+        self._q = deque()  # (index, value), values decreasing
+
+    def update(self, x):
+        q = self._q
+        while q and q[-1][1] <= x:
+            q.pop()
+        q.append((self.count, x))
+        if q[0][0] <= self.count - self.n:
+            q.popleft()
+        self.count += 1
+        return q[0][1] if self.count >= self.n else None
+
+
+class RollingMin:
+    """Min of the last n values via a monotonic deque (amortized O(1))."""
+
+    def __init__(self, n):
+        self.n = n
+        self.count = 0
+        self._q = deque()  # (index, value), values increasing
+
+    def update(self, x):
+        q = self._q
+        while q and q[-1][1] >= x:
+            q.pop()
+        q.append((self.count, x))
+        if q[0][0] <= self.count - self.n:
+            q.popleft()
+        self.count += 1
+        return q[0][1] if self.count >= self.n else None
+
+
+def rolling_max(x, n):
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(len(x), np.nan)
+    if len(x) >= n:
+        out[n - 1 :] = sliding_window_view(x, n).max(axis=1)
+    return out
+
+
+def rolling_min(x, n):
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(len(x), np.nan)
+    if len(x) >= n:
+        out[n - 1 :] = sliding_window_view(x, n).min(axis=1)
+    return out
+
+
+class Channel:
+    """Rolling high/low channel over the last n bars."""
+
+    def __init__(self, n):
+        self._hi = RollingMax(n)
+        self._lo = RollingMin(n)
+
+    def update(self, high, low):
+        hi = self._hi.update(high)
+        lo = self._lo.update(low)
+        return None if hi is None else (hi, lo)
+
+
+def channel(high, low, n):
+    return rolling_max(high, n), rolling_min(low, n)
@@ -0,0 +1,140 @@
+import time
+from collections import deque
+
+from stream_codec import Quote
+
+OVERLOAD_BLOCK = "block"
+OVERLOAD_SPILL = "spill"
+OVERLOAD_DROP = "drop"
+OVERLOAD_POLICIES = (OVERLOAD_BLOCK, OVERLOAD_SPILL, OVERLOAD_DROP)
+MAX_SPILL = 100_000  # trades parked beyond a full ring
+
+
+def merge_quote(old, new):
+    """Overlay a (possibly partial) quote update on the pending one."""
+    if old is None:
+        return new
+    return Quote._make(n if n is not None else o for n, o in zip(new, old))
+
+
+class IngestStage:
+    """Bounded front door between the WebSocket thread and a tick ring.
+
+    Quotes are conflated: each symbol keeps a single pending quote that
+    newer updates are merged into, and the consumer takes it with
+    take_quote() once per drain. Trades go into the ring; when it is full
+    the overload policy decides what the WebSocket thread does:
+
+    - "block" (default): wait until the consumer frees space, pushing
+      backpressure onto the socket. Nothing is dropped.
+    - "spill": park the overflow in a side queue of up to `max_spill`
+      trades, blocking like "block" once that is full. Nothing is dropped.
+    - "drop": as "spill", but trades past `max_spill` are discarded and
+      counted in `trades_dropped`.
+
+    Nothing here takes a lock. The producer only appends to the spill
+    queue, tagging each batch with the ring's write position at that
+    moment, and the consumer only removes from it: drain() hands over a
+    spilled batch once every ring row written before it has been read, so
+    spilled trades keep their order and still reach the bar being built
+    when the stream goes quiet after a burst.
+    """
+
+    def __init__(self, ring, policy=OVERLOAD_BLOCK, max_spill=MAX_SPILL):
+        if policy not in OVERLOAD_POLICIES:
+            raise ValueError(f"unknown overload policy: {policy}")
+        self.ring = ring
+        self.policy = policy
+        self.max_spill = max_spill
+        self.latest_quotes = {}  # symbol index -> pending Quote
+        self._spill = deque()  # (ring head when parked, records, sym)
+        self.trades_in = 0
+        self.quotes_in = 0
+        self.quotes_conflated = 0
+        self.trades_spilled = 0  # producer-owned
+        self.trades_unspilled = 0  # consumer-owned
+        self.trades_dropped = 0
+        self.blocked = 0
+        self.blocked_secs = 0.0
+
+    @property
+    def spill_depth(self):
+        return self.trades_spilled - self.trades_unspilled
+
+    # ---- producer side (WebSocket thread) ----
+    def push_quotes(self, records, sym):
+        self.quotes_in += len(records)
+        pending = self.latest_quotes.get(sym)
+        if pending is not None:
+            self.quotes_conflated += 1
+        for q in records:
+            pending = merge_quote(pending, q)
+        self.latest_quotes[sym] = pending
+        self.quotes_conflated += len(records) - 1
+
+    def push_trades(self, records, sym):
+        self.trades_in += len(records)
+        if not self._spill:
+            n, total = self.ring.offer(records, sym)
+            if n == total:
+                return
+            records = records[n:]
+        # Ring full, or older trades still parked ahead of these.
+        if self.policy == OVERLOAD_BLOCK:
+            rest = list(records)
+            self._wait(lambda: self._offer_all(rest, sym))
+            return
+        room = self.max_spill - self.spill_depth
+        if len(records) > room:
+            if self.policy == OVERLOAD_DROP:
+                self.trades_dropped += len(records) - room
+                records = records[: max(room, 0)]
+            else:
+                self._wait(lambda: self.spill_depth + len(records) <= self.max_spill)
+        if records:
+            self._spill.append((self.ring.head, records, sym))
+            self.trades_spilled += len(records)
+
+    def _offer_all(self, records, sym):
+        if self._spill:
+            return False  # let the consumer hand the parked trades over first
+        n, total = self.ring.offer(records, sym)
+        del records[:n]
+        return not records
+
+    def _wait(self, ready):
+        start = time.perf_counter()
+        self.blocked += 1
+        while not ready():
+            time.sleep(0.0005)
+        self.blocked_secs += time.perf_counter() - start
+
+    # ---- consumer side (bar thread) ----
+    def drain(self):
+        """Pending ring ticks plus any spilled trade batches, oldest first."""
+        ticks = self.ring.drain()
+        if not self._spill:
+            return ticks, ()
+        read = self.ring.tail
+        spilled = []
+        while self._spill and self._spill[0][0] <= read:
+            _, records, sym = self._spill.popleft()
+            self.trades_unspilled += len(records)
+            spilled.append((records, sym))
+        return ticks, spilled
+
+    def take_quote(self, sym):
+        return self.latest_quotes.pop(sym, None)
+
+    def stats(self):
+        return {
+            "trades_in": self.trades_in,
+            "quotes_in": self.quotes_in,
+            "quotes_conflated": self.quotes_conflated,
+            "trades_spilled": self.trades_spilled,
+            "trades_dropped": self.trades_dropped,
+            "spill_depth": self.spill_depth,
+            "blocked": self.blocked,
+            "blocked_secs": self.blocked_secs,
+            "ring": self.ring.stats(),
+        }
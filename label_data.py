@@ -1,17 +1,23 @@
-import pandas as pd
 import os
 
+from data_quality import repair, print_report
+
 
 def label_csv(file_path):
-    df = pd.read_csv(file_path, header=None)
-    df.columns = ["time", "open", "high", "low", "close", "volume"]
-    df.to_csv(file_path, index=False)
+    """Give a recorded file its header row (and fix anything else wrong with it).
+
+    Files that already have a header are detected and left alone, so this
+    is safe to re-run over the whole folder.
+    """
+    return repair(file_path)
 
 
 if __name__ == "__main__":
     folder = "data"
-    for filename in os.listdir(folder):
+    for filename in sorted(os.listdir(folder)):
         if filename.endswith(".csv"):
             file_path = os.path.join(folder, filename)
-            label_csv(file_path)
-            print(f"Labeled {filename}")
+            report = label_csv(file_path)
+            if "written" in report:
+                print(f"Labeled {filename}")
+                print_report(report)
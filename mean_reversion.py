@@ -0,0 +1,101 @@
+import numpy as np
+
+from indicators import RollingMean, rolling_mean
+
+
+class MeanReversion:
+    """Long-only mean reversion on 1s closes.
+
+    Buys when the close sits more than `threshold_factor` of the rolling
+    mean below that mean, bracketed by a symmetric stop/target
+    `stop_ticks` away. The backtest, the replay harness and the live trade
+    loop all drive it the same way: on_bar() for every bar (the window
+    always advances), with state["position"] set by the driver while a
+    trade is open, and on_tick() for every price while one is, which
+    decides whether the stop or the target has been hit.
+    """
+
+    def __init__(self, lookback=120, threshold_factor=0.00075, stop_ticks=50, tick_size=0.25):
+        self.lookback = lookback
+        self.threshold_factor = threshold_factor
+        self.stop_ticks = stop_ticks
+        self.tick_size = tick_size
+
+    def new_state(self):
+        return {"mean": RollingMean(self.lookback), "position": None}
+
+    def seed(self, state, closes):
+        """Pre-fill the window with earlier closes (warm start / recovery)."""
+        mean = state["mean"] = RollingMean(self.lookback)
+        for c in closes:
+            mean.update(c)
+
+    def is_warm(self, state):
+        """Window full of observed closes (no backfilled synthetic bars left in it)."""
+        mean = state.get("mean")
+        return mean is not None and mean.count >= self.lookback and not state.get("synthetic")
+
+    def on_bar(self, bar, state):
+        mean = state.get("mean")
+        if mean is None:
+            mean = state["mean"] = RollingMean(self.lookback)
+        current_close = bar["close"]
+        mean_close = mean.update(current_close)
+
+        # Bars carried over an outage keep the window moving but make no
+        # signals until the last of them has rolled out of it.
+        if bar.get("synthetic"):
+            state["synthetic"] = self.lookback
+            return None
+        if state.get("synthetic"):
+            state["synthetic"] -= 1
+            if state["synthetic"]:
+                return None
+
+        if mean_close is None or state.get("position"):
+            return None
+
+        threshold = self.threshold_factor * mean_close
+
+        if current_close < mean_close - threshold:
+            return self.signal("BUY", current_close)
+        return None
+
+    def batch_signals(self, close):
+        """Entry condition for every bar of `close`, as on_bar() sees it when flat.
+
+        Uses the batch twin of the streaming mean, so the two agree bar-for-bar.
+        """
+        mean_close = rolling_mean(close, self.lookback)
+        with np.errstate(invalid="ignore"):
+            return close < mean_close - self.threshold_factor * mean_close
+
+    def on_tick(self, price, trade):
+        """"STOP", "TARGET" or None for an open `trade` (side/stop/target) at `price`.
+
+        The one bracket rule: live exits, replay, the tick backtest and
+        run_backtest_loop all ask this; bt_kernel._simulate is its array
+        twin (check_kernel.py keeps them in step).
+        """
+        if trade["side"] == "BUY":
+            if price <= trade["stop"]:
+                return "STOP"
+            if price >= trade["target"]:
+                return "TARGET"
+        else:
+            if price >= trade["stop"]:
+                return "STOP"
+            if price <= trade["target"]:
+                return "TARGET"
+        return None
+
+    def bracket(self, side, entry):
+        """(stop, target) for a position entered at `entry`."""
+        offset = self.stop_ticks * self.tick_size
+        if side == "BUY":
+            return entry - offset, entry + offset
+        return entry + offset, entry - offset
+
+    def signal(self, side, entry):
+        stop, target = self.bracket(side, entry)
+        return {"side": side, "entry": entry, "stop": stop, "target": target}
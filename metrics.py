@@ -0,0 +1,189 @@
+import bisect
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+# ---------- Metric types -------------
+class Counter:
+    """Monotonic count. inc() is a single attribute add, cheap enough per tick."""
+
+    kind = "counter"
+
+    def __init__(self, fn=None):
+        self.value = 0
+        self.fn = fn  # read at scrape time instead of value
+
+    def inc(self, n=1):
+        self.value += n
+
+    def samples(self, name, labels):
+        yield name, labels, self.fn() if self.fn is not None else self.value
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, fn=None):
+        self.value = 0.0
+        self.fn = fn
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, n=1):
+        self.value += n
+
+    def samples(self, name, labels):
+        yield name, labels, self.fn() if self.fn is not None else self.value
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is one bisect and two adds."""
+
+    kind = "histogram"
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def time(self):
+        return _Timer(self)
+
+    def samples(self, name, labels):
+        total = 0
+        for bound, n in zip(self.bounds, self.counts):
+            total += n
+            yield f"{name}_bucket", labels + (("le", _fmt(bound)),), total
+        total += self.counts[-1]
+        yield f"{name}_bucket", labels + (("le", "+Inf"),), total
+        yield f"{name}_sum", labels, self.sum
+        yield f"{name}_count", labels, total
+
+
+class _Timer:
+    __slots__ = ("hist", "t0")
+
+    def __init__(self, hist):
+        self.hist = hist
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.t0)
+        return False
+
+
+# ---------- Registry -------------
+class Registry:
+    """Metrics by (name, labels). Asking again for the same series returns it.
+
+    Hot paths should look a metric up once and keep the object; callback
+    metrics (fn=...) are read only when the endpoint is scraped.
+    """
+
+    def __init__(self):
+        self._families = {}  # name -> (kind, help, {labels: metric})
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help, labels, make):
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = (cls.kind, help, {})
+            elif family[0] != cls.kind:
+                raise ValueError(f"{name} is already a {family[0]}")
+            metric = family[2].get(key)
+            if metric is None:
+                metric = family[2][key] = make()
+            return metric
+
+    def counter(self, name, help="", fn=None, **labels):
+        return self._get(Counter, name, help, labels, lambda: Counter(fn))
+
+    def gauge(self, name, help="", fn=None, **labels):
+        return self._get(Gauge, name, help, labels, lambda: Gauge(fn))
+
+    def histogram(self, name, help="", buckets=LATENCY_BUCKETS, **labels):
+        return self._get(Histogram, name, help, labels, lambda: Histogram(buckets))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            families = [(n, k, h, list(m.items())) for n, (k, h, m) in self._families.items()]
+        lines = []
+        for name, kind, help, series in sorted(families):
+            if help:
+                lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, metric in series:
+                try:
+                    samples = list(metric.samples(name, labels))
+                except Exception:
+                    continue  # a callback that fails just drops out of this scrape
+                for sample, sample_labels, value in samples:
+                    lines.append(f"{sample}{_labels(sample_labels)} {_fmt(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+    return "{" + body + "}"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt(value):
+    if value is None:
+        return "NaN"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+REGISTRY = Registry()
+
+
+# ---------- HTTP endpoint -------------
+def serve(port=9108, host="127.0.0.1", registry=REGISTRY):
+    """Serve /metrics from a daemon thread; returns the server."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics").start()
+    print(f"📈 Metrics on http://{host}:{port}/metrics")
+    return server
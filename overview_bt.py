@@ -1,8 +1,10 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 
+from charts import equity_chart
+
 CSV_FILE = "tests/test_9.csv"
+CHART_PATH = "charts/overview_equity.png"
 
 # Constants for MNQ
 TICK_VALUE = 0.50  # $ per tick per contract
@@ -80,16 +82,15 @@ def analyze_trades():
     print(f"Sharpe Ratio: {sharpe_ratio:.2f}")
     print(f"Avg time in trade: {avg_duration_str}")
 
-    plt.figure(figsize=(12, 5))
-    plt.plot(df["cum_pnl"], label="Equity Curve ($)", color="green")
-    plt.xlabel("Trade #")
-    plt.ylabel("Cumulative PnL ($)")
-    plt.title("Equity Curve ($)")
-    plt.grid(True)
-    plt.legend()
-
-    plt.tight_layout()
-    plt.show()
+    equity_chart(
+        CHART_PATH,
+        df["cum_pnl"].to_numpy(),
+        title="Equity Curve ($)",
+        xlabel="Trade #",
+        ylabel="Cumulative PnL ($)",
+        color="green",
+    )
+    print(f"📈 Equity curve saved to {CHART_PATH}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,85 @@
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from fastlog import get_logger
+
+log = get_logger("stream")
+
+
+class Backoff:
+    """Exponential backoff with full jitter: uniform(0, min(cap, base * 2**n))."""
+
+    def __init__(self, base=0.05, cap=5.0):
+        self.base = base
+        self.cap = cap
+        self.attempt = 0
+
+    def next_delay(self):
+        delay = random.uniform(0, min(self.cap, self.base * (2**self.attempt)))
+        self.attempt += 1
+        return delay
+
+    def reset(self):
+        self.attempt = 0
+
+
+class StreamReconnector:
+    """Reconnect bookkeeping for start_streaming.
+
+    Subscriptions go out concurrently over the REST client's pooled
+    session, retries use jittered exponential backoff, and the time from
+    losing the stream to the first tick on the new one is recorded for
+    every (re)connect.
+    """
+
+    def __init__(self, rest, symbols, backoff=None):
+        self.rest = rest
+        self.symbols = list(symbols)
+        self.backoff = backoff or Backoff()
+        self.reconnects = 0
+        self.first_tick_latency = deque(maxlen=100)
+        self.awaiting_tick = True
+        self._down_since = time.perf_counter()
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="subscribe")
+
+    def connection_lost(self):
+        """Mark the stream as down; the blackout clock starts at the first loss."""
+        if not self.awaiting_tick:
+            self.awaiting_tick = True
+            self._down_since = time.perf_counter()
+            self.reconnects += 1
+
+    def next_delay(self):
+        return self.backoff.next_delay()
+
+    def subscribe(self, stream_id):
+        jobs = {
+            "Quotes": self._pool.submit(
+                self.rest.subscribe_quotes, stream_id, self.symbols
+            ),
+            "Trades": self._pool.submit(
+                self.rest.subscribe_trades, stream_id, self.symbols
+            ),
+        }
+        ok = True
+        for name, job in jobs.items():
+            try:
+                r = job.result()
+                log.info("%s subscribe: %s %s", name, r.status_code, r.text[:500])
+                ok = ok and r.ok
+            except Exception as e:
+                log.error("Failed to subscribe %s: %s", name.lower(), e)
+                ok = False
+        return ok
+
+    def mark_first_tick(self):
+        elapsed = time.perf_counter() - self._down_since
+        self.awaiting_tick = False
+        self.first_tick_latency.append(elapsed)
+        self.backoff.reset()
+        log.info(
+            "First tick %.0fms after connect (reconnects: %d)", elapsed * 1000, self.reconnects
+        )
+        return elapsed
@@ -0,0 +1,93 @@
+import csv
+import time
+
+from exits import ExitManager
+from mean_reversion import MeanReversion
+from stream_codec import Trade
+
+TICK_SIZE = 0.25
+TICK_VALUE = 0.50
+COMMISSION_PER_TRADE = 0.78
+
+
+def read_bars(path):
+    """Recorded 1s bars from a CSV, with or without a header row."""
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            if len(row) != 6:
+                continue
+            try:
+                t = int(float(row[0]))
+                o, h, l, c, v = (float(x) for x in row[1:])
+            except ValueError:
+                continue
+            yield {"t": t, "open": o, "high": h, "low": l, "close": c, "volume": v}
+
+
+def replay(bars, strategy, symbol="REPLAY", speed=None):
+    """Run recorded bars through the live components, with paper fills.
+
+    Each bar is fed to the ExitManager as open/high/low/close trade ticks
+    and then to strategy.on_bar(), the same calls the live trade loop
+    makes. Exits fill at the bracket level. `speed` paces the replay
+    (1.0 = real time); None runs as fast as possible.
+    """
+    trades = []
+    entries = {}
+
+    def on_exit(bracket, price, reason, resp):
+        exit_price = bracket.stop if reason == "STOP" else bracket.target
+        ticks = int((exit_price - bracket.entry) / TICK_SIZE)
+        entry_t = entries.pop(bracket.key)
+        trades.append(
+            {
+                "side": bracket.side,
+                "entry": bracket.entry,
+                "exit": exit_price,
+                "ticks": ticks,
+                "pnl": ticks * TICK_VALUE - COMMISSION_PER_TRADE,
+                "duration_sec": now[0] - entry_t,
+                "start_time": entry_t,
+                "end_time": now[0],
+            }
+        )
+
+    exits = ExitManager(
+        lambda symbol, side, qty: {"paper": True}, strategy.on_tick, on_exit=on_exit, sync=True
+    )
+    state = strategy.new_state()
+    now = [None]
+
+    for bar in bars:
+        if speed and now[0] is not None:
+            time.sleep(max(0.0, (bar["t"] - now[0]) / speed))
+        now[0] = bar["t"]
+
+        exits.on_trades(
+            [Trade(symbol, bar[k], 0, bar["t"]) for k in ("open", "high", "low", "close")]
+        )
+
+        state["position"] = "BUY" if exits.is_armed(symbol) else None
+        signal = strategy.on_bar(bar, state)
+        if signal is not None:
+            b = exits.arm(
+                symbol,
+                signal["side"],
+                1,
+                signal["entry"],
+                signal["stop"],
+                signal["target"],
+                key=f"{symbol}:{bar['t']}",
+            )
+            entries[b.key] = bar["t"]
+
+    exits.close()
+    return trades
+
+
+if __name__ == "__main__":
+    path = "data/MNQ_1s_10.29.2025.csv"
+    trades = replay(read_bars(path), MeanReversion())
+    wins = sum(1 for t in trades if t["ticks"] > 0)
+    print(f"Replayed {path}: {len(trades)} trades, {wins} wins")
+    print(f"Net PnL: ${sum(t['pnl'] for t in trades):.2f}")
@@ -0,0 +1,171 @@
+"""Content-addressed cache for backtest results.
+
+A result is keyed by a hash of the input bar files, the version of the
+code that produced it and the full parameter set, so an entry can only be
+reused for exactly the same computation:
+
+    cache = ResultCache()
+    key = cache.key(cache.data_digest(paths), code_version(), params)
+    trades = cache.get(key)
+    if trades is None:
+        trades = run(...)
+        cache.put(key, trades)
+
+code_version() hashes the source of the strategy/backtest modules, so
+editing any of them changes every key; prune() drops entries from other
+versions. Entries are pickles named <version>-<key>.pkl; reads refresh
+the mtime and put() evicts least recently used files past `max_bytes`.
+File digests are remembered by (size, mtime) so unchanged data isn't
+re-read on every run.
+"""
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sys
+
+CODE_MODULES = ("mean_reversion", "indicators", "bt_kernel", "backtest")
+
+
+def code_version(modules=CODE_MODULES):
+    """Short hash of the source of the modules a result depends on."""
+    h = hashlib.sha256()
+    for name in modules:
+        module = sys.modules.get(name)
+        if module is None:
+            module = __import__(name)
+        h.update(name.encode())
+        h.update(inspect.getsource(module).encode())
+    return h.hexdigest()[:12]
+
+
+class ResultCache:
+    def __init__(self, directory=".bt_cache", max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._digests_path = os.path.join(directory, "digests.json")
+        try:
+            with open(self._digests_path) as f:
+                self._digests = json.load(f)
+        except (OSError, ValueError):
+            self._digests = {}
+
+    # ---------- Keys -------------
+    def file_digest(self, path):
+        st = os.stat(path)
+        stamp = [st.st_size, st.st_mtime_ns]
+        known = self._digests.get(os.path.abspath(path))
+        if known is not None and known[0] == stamp:
+            return known[1]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self._digests[os.path.abspath(path)] = [stamp, digest]
+        tmp = self._digests_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._digests, f)
+        os.replace(tmp, self._digests_path)
+        return digest
+
+    def data_digest(self, paths):
+        h = hashlib.sha256()
+        for path in paths:
+            h.update(self.file_digest(path).encode())
+        return h.hexdigest()
+
+    @staticmethod
+    def key(data_digest, version, params):
+        blob = json.dumps(
+            {"data": data_digest, "version": version, "params": params},
+            sort_keys=True,
+            default=repr,
+        )
+        return f"{version}-{hashlib.sha256(blob.encode()).hexdigest()[:32]}"
+
+    # ---------- Entries -------------
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".pkl")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception:
+            # Torn or unreadable entry: treat as a miss and drop it.
+            self.misses += 1
+            self._remove(path)
+            return None
+        os.utime(path)  # mark as recently used
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self.evict()
+
+    def _entries(self):
+        out = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".pkl"):
+                path = os.path.join(self.directory, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                out.append((st.st_mtime_ns, st.st_size, path))
+        return out
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def prune(self, keep_version):
+        """Remove every entry not produced by `keep_version`."""
+        removed = 0
+        for _, _, path in self._entries():
+            if not os.path.basename(path).startswith(keep_version + "-"):
+                self._remove(path)
+                removed += 1
+        return removed
+
+    def clear(self):
+        for _, _, path in self._entries():
+            self._remove(path)
+
+    def stats(self):
+        entries = self._entries()
+        return {
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,177 @@
+import threading
+
+from fastlog import get_logger
+
+log = get_logger("risk")
+
+
+class RiskEngine:
+    """In-process account risk: session PnL, peak equity and drawdown.
+
+    Entries and exits come from the order path (on_entry / on_exit), marks
+    from the trade feed (on_trades). Every update is O(1): each open
+    position keeps its own unrealized PnL and the total is adjusted by the
+    difference, so a tick never re-sums the book. Equity is realized plus
+    unrealized session PnL; once it falls `drawdown_limit` below its peak
+    (or `loss_limit` below zero) new entries are refused until
+    new_session() or resume().
+
+    on_change(realized, peak_equity, paused) fires when realized PnL or the
+    pause state changes, which is what the journal needs to restore the
+    session; open positions are re-marked from the feed after a restart.
+    """
+
+    def __init__(
+        self,
+        drawdown_limit,
+        loss_limit=None,
+        point_value=2.0,
+        commission=0.0,
+        on_change=None,
+    ):
+        self.drawdown_limit = drawdown_limit
+        self.loss_limit = loss_limit
+        self.point_value = point_value  # $ per point per contract
+        self.commission = commission  # $ per round trip
+        self.on_change = on_change
+        self.session = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.realized = 0.0
+        self.unrealized = 0.0
+        self.peak_equity = 0.0
+        self.max_drawdown = 0.0
+        self.paused = False
+        self.pause_reason = None
+        self._positions = {}  # symbol -> [direction * qty * point_value, entry, open pnl]
+
+    # ---------- Session -------------
+    def new_session(self, session):
+        """Start a fresh intraday session (e.g. a new trading date)."""
+        with self._lock:
+            open_positions = self._positions
+            self._reset()
+            self.session = session
+            # Positions carried over re-mark from their entry.
+            for symbol, pos in open_positions.items():
+                self._positions[symbol] = [pos[0], pos[1], 0.0]
+        self._changed()
+
+    def restore(self, session, realized, peak_equity, paused):
+        with self._lock:
+            self.session = session
+            self.realized = float(realized)
+            self.peak_equity = max(float(peak_equity), self.realized)
+            self.max_drawdown = self.peak_equity - self.realized
+            self.paused = bool(paused)
+            self.pause_reason = "restored" if paused else None
+
+    def halt(self, reason):
+        """Refuse new entries until resume() (e.g. an exit the bot couldn't send)."""
+        with self._lock:
+            if self.paused:
+                return
+            self._pause(reason)
+        self._changed()
+
+    def resume(self):
+        with self._lock:
+            self.paused = False
+            self.pause_reason = None
+        self._changed()
+
+    # ---------- Queries -------------
+    @property
+    def equity(self):
+        return self.realized + self.unrealized
+
+    @property
+    def drawdown(self):
+        return self.peak_equity - self.equity
+
+    def allow_entry(self):
+        """True while new entries are allowed; no locks, no network."""
+        return not self.paused
+
+    def snapshot(self):
+        return {
+            "session": self.session,
+            "realized": self.realized,
+            "unrealized": self.unrealized,
+            "equity": self.equity,
+            "peak_equity": self.peak_equity,
+            "drawdown": self.drawdown,
+            "max_drawdown": self.max_drawdown,
+            "paused": self.paused,
+            "pause_reason": self.pause_reason,
+            "positions": len(self._positions),
+        }
+
+    # ---------- Updates -------------
+    def on_entry(self, symbol, side, qty, price):
+        direction = 1 if str(side).upper() in ("BUY", "LONG") else -1
+        with self._lock:
+            old = self._positions.get(symbol)
+            if old is not None:
+                self.unrealized -= old[2]
+            self._positions[symbol] = [direction * qty * self.point_value, float(price), 0.0]
+
+    def on_exit(self, symbol, price):
+        with self._lock:
+            pos = self._positions.pop(symbol, None)
+            if pos is None:
+                return None
+            self.unrealized -= pos[2]
+            pnl = (price - pos[1]) * pos[0] - self.commission * abs(pos[0] / self.point_value)
+            self.realized += pnl
+            self._check()
+        self._changed()
+        return pnl
+
+    def mark(self, symbol, price):
+        if symbol not in self._positions:
+            return
+        with self._lock:
+            pos = self._positions.get(symbol)
+            if pos is None:
+                return
+            open_pnl = (price - pos[1]) * pos[0]
+            self.unrealized += open_pnl - pos[2]
+            pos[2] = open_pnl
+            was_paused = self.paused
+            self._check()
+        if self.paused and not was_paused:
+            self._changed()
+
+    # Called on the WebSocket thread for every trade message.
+    def on_trades(self, records):
+        if not self._positions:
+            return
+        for r in records:
+            if r.price is not None and r.sym in self._positions:
+                self.mark(r.sym, r.price)
+
+    def _check(self):
+        equity = self.realized + self.unrealized
+        if equity > self.peak_equity:
+            self.peak_equity = equity
+        drawdown = self.peak_equity - equity
+        if drawdown > self.max_drawdown:
+            self.max_drawdown = drawdown
+        if self.paused:
+            return
+        if drawdown >= self.drawdown_limit:
+            self._pause(f"drawdown {drawdown:.2f} >= {self.drawdown_limit}")
+        elif self.loss_limit is not None and equity <= -self.loss_limit:
+            self._pause(f"loss {-equity:.2f} >= {self.loss_limit}")
+
+    def _pause(self, reason):
+        self.paused = True
+        self.pause_reason = reason
+        log.warning("🛑 Trading paused: %s", reason)
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change(self.realized, self.peak_equity, self.paused)
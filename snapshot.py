@@ -0,0 +1,169 @@
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import deque
+
+REC_FULL = 1
+REC_BAR = 2
+REC_BRACKETS = 3
+REC_ACCOUNT = 4
+
+# Frame: kind (u8), payload length (u32), crc32 of payload (u32)
+_HEADER = struct.Struct("<BII")
+_BAR = struct.Struct("<qd")  # t, close; followed by the symbol
+_ACCOUNT = struct.Struct("<ddB")  # realized, peak_equity, trading_paused
+
+
+class StateJournal:
+    """Append-only journal of live engine state.
+
+    Each bar costs one small binary record (one write() call); bracket
+    and account changes are logged as they happen. Every `compact_every`
+    bars the journal is rewritten as a single full snapshot (tmp file,
+    fsync, rename), so restore() only ever replays a short file. A torn
+    record at the tail from a crash mid-write fails its CRC and is cut off.
+    """
+
+    def __init__(self, path, lookback=120, compact_every=600):
+        self.path = path
+        self.lookback = lookback
+        self.compact_every = compact_every
+        self.windows = {}
+        self.brackets = []
+        self.account = {"realized": 0.0, "peak_equity": 0.0, "trading_paused": False}
+        self.last_write = None
+        self._since_full = 0
+        self._fd = None
+        self._lock = threading.Lock()
+
+    # ---------- Restore -------------
+    def restore(self):
+        """Load the journal into memory and return the recovered state."""
+        if not os.path.exists(self.path):
+            return self.state()
+
+        with open(self.path, "rb") as f:
+            data = f.read()
+
+        pos = 0
+        good = 0
+        while pos + _HEADER.size <= len(data):
+            kind, length, crc = _HEADER.unpack_from(data, pos)
+            start = pos + _HEADER.size
+            payload = data[start : start + length]
+            if len(payload) != length or zlib.crc32(payload) != crc:
+                break
+            self._apply(kind, payload)
+            pos = good = start + length
+
+        if good < len(data):
+            print(f"Journal {self.path}: dropped {len(data) - good} torn bytes")
+            with open(self.path, "r+b") as f:
+                f.truncate(good)
+        return self.state()
+
+    def _apply(self, kind, payload):
+        if kind == REC_BAR:
+            t, close = _BAR.unpack_from(payload)
+            symbol = payload[_BAR.size :].decode()
+            self._window(symbol).append((t, close))
+            self.last_write = t
+        elif kind == REC_BRACKETS:
+            self.brackets = json.loads(payload)
+        elif kind == REC_ACCOUNT:
+            realized, peak, paused = _ACCOUNT.unpack(payload)
+            self.account = {
+                "realized": realized,
+                "peak_equity": peak,
+                "trading_paused": bool(paused),
+            }
+        elif kind == REC_FULL:
+            full = json.loads(payload)
+            self.windows = {
+                sym: deque(map(tuple, rows), maxlen=self.lookback)
+                for sym, rows in full["windows"].items()
+            }
+            self.brackets = full["brackets"]
+            self.account = full["account"]
+            if "current_equity" in self.account:  # journals written before the rename
+                self.account["realized"] = self.account.pop("current_equity")
+            self.last_write = full.get("written_at")
+
+    def state(self):
+        return {
+            "windows": {sym: list(rows) for sym, rows in self.windows.items()},
+            "brackets": list(self.brackets),
+            "account": dict(self.account),
+            "last_write": self.last_write,
+        }
+
+    # ---------- Append -------------
+    def _window(self, symbol):
+        rows = self.windows.get(symbol)
+        if rows is None:
+            rows = self.windows[symbol] = deque(maxlen=self.lookback)
+        return rows
+
+    def _append(self, kind, payload):
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        os.write(self._fd, _HEADER.pack(kind, len(payload), zlib.crc32(payload)) + payload)
+
+    def record_bar(self, symbol, t, close):
+        with self._lock:
+            self._window(symbol).append((t, close))
+            self.last_write = t
+            self._append(REC_BAR, _BAR.pack(t, close) + symbol.encode())
+            self._since_full += 1
+            if self._since_full >= self.compact_every:
+                self._compact()
+
+    def record_brackets(self, brackets):
+        with self._lock:
+            self.brackets = list(brackets)
+            self._append(REC_BRACKETS, json.dumps(self.brackets).encode())
+
+    def record_account(self, realized, peak_equity, trading_paused):
+        """Session realized PnL (not equity: open positions re-mark after a restart)."""
+        with self._lock:
+            self.account = {
+                "realized": realized,
+                "peak_equity": peak_equity,
+                "trading_paused": trading_paused,
+            }
+            self._append(
+                REC_ACCOUNT,
+                _ACCOUNT.pack(realized, peak_equity, 1 if trading_paused else 0),
+            )
+
+    def compact(self):
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        full = {
+            "windows": {sym: list(rows) for sym, rows in self.windows.items()},
+            "brackets": self.brackets,
+            "account": self.account,
+            "written_at": time.time(),
+        }
+        payload = json.dumps(full).encode()
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(REC_FULL, len(payload), zlib.crc32(payload)) + payload)
+            f.flush()
+            os.fsync(f.fileno())
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        os.replace(tmp, self.path)
+        self._since_full = 0
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
@@ -0,0 +1,101 @@
+import threading
+
+
+class SpscRing:
+    """Index bookkeeping for a single-producer/single-consumer ring.
+
+    `head` is only ever advanced by the producer and `tail` only by the
+    consumer, so neither side takes a lock on put/get. The wake-up event
+    is only touched when the consumer is actually parked in wait().
+    """
+
+    def __init__(self, capacity):
+        if capacity <= 0 or capacity & (capacity - 1):
+            raise ValueError("capacity must be a power of two")
+        self.capacity = capacity
+        self._mask = capacity - 1
+        self.head = 0  # next write position (monotonic, producer-owned)
+        self.tail = 0  # next read position (monotonic, consumer-owned)
+        self.high_watermark = 0
+        self.dropped = 0
+        self._wake = threading.Event()
+        self._waiting = False
+
+    def __len__(self):
+        return self.head - self.tail
+
+    @property
+    def occupancy(self):
+        return self.head - self.tail
+
+    def free(self):
+        return self.capacity - (self.head - self.tail)
+
+    def _publish(self, n):
+        self.head += n
+        depth = self.head - self.tail
+        if depth > self.high_watermark:
+            self.high_watermark = depth
+        if self._waiting:
+            self._wake.set()
+
+    def wait(self, timeout=None):
+        """Block until something is pending or `timeout` expires."""
+        if self.head != self.tail:
+            return True
+        self._wake.clear()
+        self._waiting = True
+        # Re-check after announcing ourselves so a concurrent publish
+        # either shows up here or sees _waiting and sets the event.
+        if self.head == self.tail:
+            self._wake.wait(timeout)
+        self._waiting = False
+        return self.head != self.tail
+
+    def stats(self):
+        return {
+            "occupancy": self.head - self.tail,
+            "high_watermark": self.high_watermark,
+            "dropped": self.dropped,
+            "capacity": self.capacity,
+        }
+
+
+class SpscQueue(SpscRing):
+    """SPSC ring of Python objects with batch put/get."""
+
+    def __init__(self, capacity=1024):
+        super().__init__(capacity)
+        self._slots = [None] * capacity
+
+    def put(self, item):
+        if self.head - self.tail >= self.capacity:
+            self.dropped += 1
+            return False
+        self._slots[self.head & self._mask] = item
+        self._publish(1)
+        return True
+
+    def put_many(self, items):
+        n = min(len(items), self.free())
+        if n < len(items):
+            self.dropped += len(items) - n
+        pos = self.head
+        for i in range(n):
+            self._slots[(pos + i) & self._mask] = items[i]
+        if n:
+            self._publish(n)
+        return n
+
+    def get_many(self, max_items=None):
+        tail = self.tail
+        n = self.head - tail
+        if max_items is not None and n > max_items:
+            n = max_items
+        out = []
+        for i in range(n):
+            j = (tail + i) & self._mask
+            out.append(self._slots[j])
+            self._slots[j] = None
+        self.tail = tail + n
+        return out
@@ -0,0 +1,97 @@
+import json
+from collections import namedtuple
+from operator import itemgetter
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+
+# ---------- Message kinds -------------
+MSG_OTHER = 0
+MSG_PING = 1
+MSG_BALANCE = 2
+MSG_QUOTES = 3
+MSG_TRADES = 4
+MSG_BAD = 5
+
+# ---------- Typed records -------------
+# Field names follow the stream payload: s=exchSym, p=price, sz=size,
+# st=send time, b/a=bid/ask, bs/as=bid/ask size, la=last, at=ask time.
+Trade = namedtuple("Trade", ["sym", "price", "size", "ts"])
+Quote = namedtuple("Quote", ["sym", "bid", "ask", "bid_size", "ask_size", "last", "ts"])
+
+_TRADE_KEYS = ("s", "p", "sz", "st")
+_QUOTE_KEYS = ("s", "b", "a", "bs", "as", "la", "at")
+_trade_fields = itemgetter(*_TRADE_KEYS)
+_quote_fields = itemgetter(*_QUOTE_KEYS)
+
+
+def classify(message):
+    """Guess the message kind from its first key without parsing the JSON."""
+    head = message[:24]
+    if isinstance(head, (bytes, bytearray)):
+        head = head.decode("ascii", "ignore")
+    head = head.lstrip("{ \t\r\n")
+
+    if head.startswith('"tr"'):
+        return MSG_TRADES
+    if head.startswith('"q"'):
+        return MSG_QUOTES
+    if head.startswith('"b"'):
+        return MSG_BALANCE
+    if head.startswith('"p"') and "ping" in head:
+        return MSG_PING
+    return MSG_OTHER
+
+
+def _decode_trade(t):
+    try:
+        return Trade._make(_trade_fields(t))
+    except KeyError:
+        return Trade._make(map(t.get, _TRADE_KEYS))
+
+
+def _decode_quote(q):
+    # Quote updates may only carry the fields that changed.
+    try:
+        return Quote._make(_quote_fields(q))
+    except KeyError:
+        return Quote._make(map(q.get, _QUOTE_KEYS))
+
+
+def decode_message(message):
+    """Return (kind, records) for a raw stream message.
+
+    Pings and balance updates are dropped on the prefix check alone; only
+    quote/trade payloads (or messages with an unexpected layout) get parsed.
+    """
+    kind = classify(message)
+    if kind == MSG_PING or kind == MSG_BALANCE:
+        return kind, ()
+
+    try:
+        data = _loads(message)
+    except (ValueError, TypeError):
+        return MSG_BAD, ()
+
+    if kind == MSG_OTHER:
+        if not isinstance(data, dict):
+            return MSG_OTHER, ()
+        if "p" in data and "ping" in data["p"]:
+            return MSG_PING, ()
+        if "b" in data:
+            return MSG_BALANCE, ()
+        if "q" in data:
+            kind = MSG_QUOTES
+        elif "tr" in data:
+            kind = MSG_TRADES
+        else:
+            return MSG_OTHER, ()
+
+    if kind == MSG_QUOTES:
+        return kind, [_decode_quote(q) for q in data["q"]]
+    return kind, [_decode_trade(t) for t in data["tr"]]
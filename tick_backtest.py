@@ -0,0 +1,270 @@
+"""Tick-level backtest over captured WebSocket streams.
+
+Replays raw messages from capture.py logs through the same decoder the
+live engine uses, builds 1s bars from trades for the strategy (one per
+second, flat at the last close when nothing traded, as live), and
+simulates the orders the live bot would send:
+
+- every order reaches the exchange `latency` (+ optional jitter) after
+  the decision that sent it;
+- market orders fill against the book as it stands on arrival: buys at
+  the ask, sells at the bid (or the last trade +/- `no_quote_ticks` when
+  the book is stale);
+- stops give up a further `stop_slippage_ticks`.
+
+Everything is streamed: state is one book, one bar, the open position
+and a short queue of in-flight orders, so memory stays flat however many
+ticks go through. The receive timestamp is the simulation clock.
+"""
+import glob
+import random
+from collections import deque
+
+from book import TopOfBook
+from capture import CaptureReader
+from mean_reversion import MeanReversion
+from stream_codec import decode_message, MSG_QUOTES, MSG_TRADES
+
+TICK_SIZE = 0.25
+TICK_VALUE = 0.50
+COMMISSION_PER_TRADE = 0.78
+
+
+def capture_messages(paths, start_ns=None, end_ns=None):
+    """Chain (recv_ts_ns, message) across capture files in time order."""
+    for path in sorted(paths):
+        yield from CaptureReader(path).messages(start_ns, end_ns)
+
+
+class TickBacktest:
+    def __init__(
+        self,
+        strategy,
+        symbol=None,
+        latency=0.05,
+        jitter=0.0,
+        stop_slippage_ticks=1,
+        no_quote_ticks=1,
+        max_quote_age=2.0,
+        tick_size=TICK_SIZE,
+        tick_value=TICK_VALUE,
+        commission=COMMISSION_PER_TRADE,
+        seed=0,
+        on_trade=None,
+    ):
+        self.strategy = strategy
+        self.symbol = symbol
+        self.latency_ns = int(latency * 1e9)
+        self.jitter_ns = int(jitter * 1e9)
+        self.stop_slippage = stop_slippage_ticks * tick_size
+        self.no_quote_slippage = no_quote_ticks * tick_size
+        self.max_quote_age_ns = int(max_quote_age * 1e9)
+        self.tick_size = tick_size
+        self.tick_value = tick_value
+        self.commission = commission
+        self.on_trade = on_trade
+        self.trades = [] if on_trade is None else None
+        self._rng = random.Random(seed)
+
+        self.state = strategy.new_state()
+        self.book = TopOfBook(symbol)
+        self.quote_ns = None
+        self.last = None
+        self.position = None  # dict while an entry is in flight or open
+        self.pending = deque()  # (due_ns, kind, exit reason), in due order
+        self.ticks = 0
+        self.bars = 0
+        self._sec = None
+        self._bar = None
+
+    # ---------- Clock / bars -------------
+    def _delay(self):
+        if self.jitter_ns:
+            return self.latency_ns + self._rng.randrange(self.jitter_ns + 1)
+        return self.latency_ns
+
+    def _roll(self, now):
+        sec = now // 1_000_000_000
+        if self._sec is None:
+            self._sec = sec
+            return
+        if sec <= self._sec:
+            return
+        bar = self._bar
+        if bar is None:
+            self._sec = sec  # no trade seen yet, so no bars (as live)
+            return
+        # As BarAggregator.close(): one bar per second, and seconds without
+        # trades are flat bars at the last close, so the strategy window
+        # spans the same time it does live.
+        self._on_bar(bar, now)
+        close = bar["close"]
+        for t in range(self._sec + 1, sec):
+            self._on_bar(
+                {"t": t, "open": close, "high": close, "low": close, "close": close, "volume": 0},
+                now,
+            )
+        self._sec = sec
+        self._bar = {
+            "t": sec, "open": close, "high": close, "low": close, "close": close, "volume": 0,
+        }
+
+    def _on_bar(self, bar, now):
+        self.bars += 1
+        self.state["position"] = self.position["side"] if self.position else None
+        signal = self.strategy.on_bar(bar, self.state)
+        if signal is not None and self.position is None:
+            self.position = {"side": signal["side"], "signal": signal["entry"], "signal_ns": now}
+            self.pending.append((now + self._delay(), "ENTRY", None))
+
+    def _bar_trade(self, price, size):
+        bar = self._bar
+        if bar is None:
+            self._bar = {
+                "t": self._sec, "open": price, "high": price, "low": price,
+                "close": price, "volume": size or 0,
+            }
+            return
+        if price > bar["high"]:
+            bar["high"] = price
+        if price < bar["low"]:
+            bar["low"] = price
+        bar["close"] = price
+        bar["volume"] += size or 0
+
+    # ---------- Fills -------------
+    def _market_price(self, side, now):
+        fresh = self.quote_ns is not None and now - self.quote_ns <= self.max_quote_age_ns
+        if side == "BUY":
+            if fresh and self.book.ask is not None:
+                return self.book.ask
+            return None if self.last is None else self.last + self.no_quote_slippage
+        if fresh and self.book.bid is not None:
+            return self.book.bid
+        return None if self.last is None else self.last - self.no_quote_slippage
+
+    def _run_due(self, now):
+        pending = self.pending
+        while pending and pending[0][0] <= now:
+            due, kind, reason = pending.popleft()
+            pos = self.position
+            if pos is None:
+                continue
+            if kind == "ENTRY":
+                fill = self._market_price(pos["side"], due)
+                if fill is None:
+                    self.position = None  # nothing to price the order against yet
+                    continue
+                stop, target = self.strategy.bracket(pos["side"], fill)
+                pos.update(entry=fill, stop=stop, target=target, entry_ns=due, exiting=False)
+            else:
+                side = "SELL" if pos["side"] == "BUY" else "BUY"
+                fill = self._market_price(side, due)
+                if fill is None:
+                    fill = pos["stop"] if reason == "STOP" else pos["target"]
+                if reason == "STOP":
+                    fill += -self.stop_slippage if side == "SELL" else self.stop_slippage
+                self._close(pos, fill, reason, due)
+
+    def _check_exit(self, price, now):
+        pos = self.position
+        if pos is None or "entry" not in pos or pos["exiting"]:
+            return
+        reason = self.strategy.on_tick(price, pos)
+        if reason is not None:
+            pos["exiting"] = True
+            self.pending.append((now + self._delay(), "EXIT", reason))
+
+    def _close(self, pos, fill, reason, now):
+        direction = 1 if pos["side"] == "BUY" else -1
+        ticks = round((fill - pos["entry"]) * direction / self.tick_size)
+        trade = {
+            "side": pos["side"],
+            "signal": pos["signal"],
+            "entry": pos["entry"],
+            "exit": fill,
+            "ticks": ticks,
+            "pnl": ticks * self.tick_value - self.commission,
+            "reason": reason,
+            "entry_slippage_ticks": round(
+                (pos["entry"] - pos["signal"]) * direction / self.tick_size
+            ),
+            "duration_sec": (now - pos["entry_ns"]) / 1e9,
+            "start_time": pos["entry_ns"] / 1e9,
+            "end_time": now / 1e9,
+        }
+        self.position = None
+        if self.on_trade is not None:
+            self.on_trade(trade)
+        else:
+            self.trades.append(trade)
+
+    # ---------- Driver -------------
+    def run(self, messages):
+        """Feed (recv_ts_ns, raw message) pairs; returns the trades."""
+        symbol = self.symbol
+        book = self.book
+        for now, message in messages:
+            self._run_due(now)
+            self._roll(now)
+
+            kind, records = decode_message(message)
+            if kind == MSG_TRADES:
+                for r in records:
+                    if r.price is None:
+                        continue
+                    if symbol is None:
+                        symbol = self.symbol = book.symbol = r.sym
+                    elif r.sym is not None and r.sym != symbol:
+                        continue
+                    self.ticks += 1
+                    self.last = r.price
+                    self._bar_trade(r.price, r.size)
+                    self._check_exit(r.price, now)
+            elif kind == MSG_QUOTES:
+                for q in records:
+                    if symbol is not None and q.sym is not None and q.sym != symbol:
+                        continue
+                    book.on_quote(q)
+                    self.quote_ns = now
+                # A closing market order fills against the touch, so check it too.
+                pos = self.position
+                if pos is not None and "entry" in pos:
+                    touch = book.bid if pos["side"] == "BUY" else book.ask
+                    if touch is not None:
+                        self._check_exit(touch, now)
+
+        return self.trades
+
+
+def summarize(trades):
+    if not trades:
+        return {"trades": 0, "pnl": 0.0}
+    pnl = [t["pnl"] for t in trades]
+    equity = peak = max_dd = 0.0
+    for p in pnl:
+        equity += p
+        peak = max(peak, equity)
+        max_dd = max(max_dd, peak - equity)
+    return {
+        "trades": len(trades),
+        "pnl": sum(pnl),
+        "win_rate": 100.0 * sum(1 for t in trades if t["ticks"] > 0) / len(trades),
+        "avg_entry_slippage_ticks": sum(t["entry_slippage_ticks"] for t in trades) / len(trades),
+        "stops": sum(1 for t in trades if t["reason"] == "STOP"),
+        "max_drawdown": max_dd,
+    }
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    paths = sys.argv[1:] or glob.glob("capture/ws_*.cap")
+    bt = TickBacktest(MeanReversion(tick_size=TICK_SIZE), latency=0.05)
+    t0 = time.time()
+    trades = bt.run(capture_messages(paths))
+    elapsed = time.time() - t0
+    print(f"{bt.ticks} ticks, {bt.bars} bars in {elapsed:.1f}s")
+    for k, v in summarize(trades).items():
+        print(f"{k}: {v}")
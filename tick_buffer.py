@@ -0,0 +1,97 @@
+from collections import namedtuple
+
+import numpy as np
+
+from spsc import SpscRing
+from stream_codec import Trade
+
+KIND_TRADE = 0
+KIND_QUOTE = 1
+
+TickSlice = namedtuple("TickSlice", ["price", "size", "ts", "kind", "sym"])
+
+
+class TickBuffer(SpscRing):
+    """Preallocated ring of ticks stored column-wise in NumPy arrays.
+
+    The WebSocket thread appends one decoded message at a time with
+    offer(); the bar aggregator takes everything pending with drain() and
+    works on the returned arrays directly.
+    """
+
+    def __init__(self, capacity=1 << 16):
+        super().__init__(capacity)
+        self.price = np.zeros(capacity, dtype=np.float64)
+        self.size = np.zeros(capacity, dtype=np.float64)
+        self.ts = np.zeros(capacity, dtype=np.int64)
+        self.kind = np.zeros(capacity, dtype=np.uint8)
+        self.sym = np.zeros(capacity, dtype=np.uint16)
+
+    def offer(self, records, sym=0):
+        """Append as many records as fit; returns (written, total rows)."""
+        if not records:
+            return 0, 0
+
+        if type(records[0]) is Trade:
+            prices = [t.price for t in records]
+            sizes = [t.size or 0 for t in records]
+            stamps = [t.ts or 0 for t in records]
+            kind = KIND_TRADE
+        else:
+            # Only quotes with both sides present have a usable mid.
+            records = [q for q in records if q.bid is not None and q.ask is not None]
+            if not records:
+                return 0, 0
+            prices = [(q.bid + q.ask) / 2.0 for q in records]
+            sizes = [((q.bid_size or 0) + (q.ask_size or 0)) / 2.0 for q in records]
+            stamps = [q.ts or 0 for q in records]
+            kind = KIND_QUOTE
+
+        total = n = len(prices)
+        free = self.free()
+        if n > free:
+            n = free
+            if n == 0:
+                return 0, total
+        self._write(self.head, prices[:n], sizes[:n], stamps[:n], kind, sym)
+        self._publish(n)
+        return n, total
+
+    def _write(self, pos, prices, sizes, stamps, kind, sym):
+        start = pos & self._mask
+        first = min(len(prices), self.capacity - start)
+        end = start + first
+        self.price[start:end] = prices[:first]
+        self.size[start:end] = sizes[:first]
+        self.ts[start:end] = stamps[:first]
+        self.kind[start:end] = kind
+        self.sym[start:end] = sym
+        if first < len(prices):
+            rest = len(prices) - first
+            self.price[:rest] = prices[first:]
+            self.size[:rest] = sizes[first:]
+            self.ts[:rest] = stamps[first:]
+            self.kind[:rest] = kind
+            self.sym[:rest] = sym
+
+    def drain(self):
+        """Remove and return every pending tick as a TickSlice of arrays."""
+        head, tail = self.head, self.tail
+        start = tail & self._mask
+        n = head - tail
+        if start + n <= self.capacity:
+            idx = slice(start, start + n)
+            out = TickSlice(
+                self.price[idx].copy(),
+                self.size[idx].copy(),
+                self.ts[idx].copy(),
+                self.kind[idx].copy(),
+                self.sym[idx].copy(),
+            )
+        else:
+            idx = np.arange(start, start + n) & self._mask
+            out = TickSlice(
+                self.price[idx], self.size[idx], self.ts[idx], self.kind[idx], self.sym[idx]
+            )
+        self.tail = head
+        return out
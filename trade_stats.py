@@ -0,0 +1,140 @@
+import math
+import threading
+
+TICK_VALUE = 0.50  # $ per tick per contract
+
+
+class TradeStats:
+    """overview_bt.analyze_trades metrics, updated in O(1) per closed trade.
+
+    Keeps running sums per outcome, Welford mean/variance of per-trade
+    PnL and running peaks of the tick and dollar equity curves, so
+    snapshot() can be called at any time and agrees with the batch
+    numbers for the same trades. As in overview_bt, pnl is ticks *
+    tick_value (before commission), wins/losses follow the result label
+    and drawdowns are measured from the running peak starting at the
+    first trade.
+    """
+
+    def __init__(self, tick_value=TICK_VALUE):
+        self.tick_value = tick_value
+        self.n = 0
+        self.wins = self.losses = 0
+        self.win_ticks = self.loss_ticks = 0
+        self.win_pnl = self.loss_pnl = 0.0
+        self.sum_ticks = 0
+        self.sum_pnl = 0.0
+        self.gross_profit = self.gross_loss = 0.0
+        self.sum_duration = 0.0
+        self.durations = 0
+        # Welford on per-trade pnl
+        self._mean = 0.0
+        self._m2 = 0.0
+        # equity curves
+        self.cum_ticks = 0
+        self.cum_pnl = 0.0
+        self.peak_ticks = None
+        self.peak_pnl = None
+        self.max_dd_ticks = 0
+        self.max_dd_pnl = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, ticks, result=None, duration_sec=None):
+        if result is None:
+            result = "WIN" if ticks > 0 else "LOSS"
+        pnl = ticks * self.tick_value
+        with self._lock:
+            self.n += 1
+            if result == "WIN":
+                self.wins += 1
+                self.win_ticks += ticks
+                self.win_pnl += pnl
+            elif result == "LOSS":
+                self.losses += 1
+                self.loss_ticks += ticks
+                self.loss_pnl += pnl
+            self.sum_ticks += ticks
+            self.sum_pnl += pnl
+            if pnl > 0:
+                self.gross_profit += pnl
+            elif pnl < 0:
+                self.gross_loss += pnl
+            if duration_sec is not None:
+                self.sum_duration += duration_sec
+                self.durations += 1
+
+            delta = pnl - self._mean
+            self._mean += delta / self.n
+            self._m2 += delta * (pnl - self._mean)
+
+            self.cum_ticks += ticks
+            self.cum_pnl += pnl
+            if self.peak_ticks is None or self.cum_ticks > self.peak_ticks:
+                self.peak_ticks = self.cum_ticks
+            if self.peak_pnl is None or self.cum_pnl > self.peak_pnl:
+                self.peak_pnl = self.cum_pnl
+            self.max_dd_ticks = min(self.max_dd_ticks, self.cum_ticks - self.peak_ticks)
+            self.max_dd_pnl = min(self.max_dd_pnl, self.cum_pnl - self.peak_pnl)
+
+    @property
+    def std_pnl(self):
+        # Sample standard deviation, as pandas' Series.std().
+        return math.sqrt(self._m2 / (self.n - 1)) if self.n > 1 else math.nan
+
+    def snapshot(self):
+        with self._lock:
+            n = self.n
+            if n == 0:
+                return {"total_trades": 0}
+            nan = math.nan
+            std = self.std_pnl
+            return {
+                "total_trades": n,
+                "wins": self.wins,
+                "losses": self.losses,
+                "win_rate": self.wins / n * 100,
+                "avg_ticks": self.sum_ticks / n,
+                "avg_pnl": self.sum_pnl / n,
+                "avg_win": self.win_ticks / self.wins if self.wins else nan,
+                "avg_win_pnl": self.win_pnl / self.wins if self.wins else nan,
+                "avg_loss": self.loss_ticks / self.losses if self.losses else nan,
+                "avg_loss_pnl": self.loss_pnl / self.losses if self.losses else nan,
+                "max_dd_ticks": self.max_dd_ticks,
+                "max_dd_pnl": self.max_dd_pnl,
+                "net_ticks": self.sum_ticks,
+                "net_pnl": self.sum_pnl,
+                "profit_factor": (
+                    self.gross_profit / abs(self.gross_loss) if self.gross_loss != 0 else math.inf
+                ),
+                "sharpe_ratio": (
+                    (self.sum_pnl / n) / std * math.sqrt(n)
+                    if std != 0 and not math.isnan(std)
+                    else nan
+                ),
+                "avg_duration_sec": self.sum_duration / self.durations if self.durations else nan,
+            }
+
+    def report(self):
+        s = self.snapshot()
+        if not s["total_trades"]:
+            return "No trades yet."
+        if math.isnan(s["avg_duration_sec"]):
+            duration = "N/A"
+        else:
+            minutes, seconds = divmod(int(s["avg_duration_sec"]), 60)
+            duration = f"{minutes}m {seconds}s"
+        return "\n".join(
+            [
+                "===== Trade Analysis =====",
+                f"Total trades: {s['total_trades']}",
+                f"Wins: {s['wins']}, Losses: {s['losses']}, Win rate: {s['win_rate']:.2f}%",
+                f"Avg ticks per trade: {s['avg_ticks']:.2f} → ${s['avg_pnl']:.2f}",
+                f"Avg win: {s['avg_win']:.2f} ticks → ${s['avg_win_pnl']:.2f}",
+                f"Avg loss: {s['avg_loss']:.2f} ticks → ${s['avg_loss_pnl']:.2f}",
+                f"Max drawdown: {s['max_dd_ticks']} ticks → ${s['max_dd_pnl']:.2f}",
+                f"Net result: {s['net_ticks']} ticks → ${s['net_pnl']:.2f}",
+                f"Profit Factor: {s['profit_factor']:.2f}",
+                f"Sharpe Ratio: {s['sharpe_ratio']:.2f}",
+                f"Avg time in trade: {duration}",
+            ]
+        )
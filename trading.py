@@ -2,7 +2,6 @@
 import json
 import time as timemod
 import threading
-import queue
 import requests
 from websocket import WebSocketApp
 import traceback
@@ -12,9 +11,26 @@ import csv
 import os
 import numpy as np
 from zoneinfo import ZoneInfo
+from stream_codec import decode_message, MSG_BAD, MSG_QUOTES, MSG_TRADES
+from engine import MultiSymbolEngine
+from exits import ExitManager
+from book import Books
+from warmstart import contiguous_start, warm_start_bars
+from snapshot import StateJournal
+from risk import RiskEngine
+from trade_stats import TradeStats
+from metrics import REGISTRY, serve as serve_metrics
+import fastlog
+from fastlog import get_logger
+from mean_reversion import MeanReversion
+from reconnect import StreamReconnector
+from backfill import GapBackfill, rest_trade_source
+from capture import CaptureWriter
+from data_quality import HEADER as DATA_HEADER
 
 # CSV_FILE = "tests/live_1.csv"
 DATA_GATHER_FILE = "data/MNQ_1s_10.29.2025.csv"
+SNAPSHOT_FILE = "live_state.journal"
 
 # if not os.path.exists(CSV_FILE):
 #     with open(CSV_FILE, mode="w", newline="") as f:
@@ -48,21 +64,116 @@ API_KEY = "fcf40e424c514511a47113896dd99329"
 ACCOUNT_ID = "23210937"
 BASE_URL = "https://live.ironbeamapi.com"
 SYMBOL = "XCME:MNQ.Z25"
+SYMBOLS = [
+    SYMBOL,
+    # "XCME:NQ.Z25",
+    # "XCME:MES.Z25",
+    # "XCME:ES.Z25",
+]
+NUM_WORKERS = 2
+OVERLOAD_POLICY = "block"  # tick ring full: "block", "spill" (bounded, lossless) or "drop"
 TICK_SIZE = 0.25
 TICK_VALUE = 0.50
 TICKS = 50
+LOOKBACK = 120
+THRESHOLD = 0.00075
+WARM_START_MAX_AGE = 60  # seconds; older recorded bars are ignored
+BACKFILL_BUDGET = 0.5  # seconds a reconnect may spend fetching missed trades
+MAX_QUOTE_AGE = 2.0  # seconds before the book is too stale to price an entry
+LOG_FILE = "logs/live.jsonl"  # structured copy of the console log; None to disable
+LOG_LEVELS = {"bars": "INFO", "ws": "INFO", "rest": "INFO", "strategy": "INFO"}
+CAPTURE_DIR = "capture"  # raw WS messages, one .cap file per day; None to disable
+METRICS_PORT = 9108  # Prometheus text on http://127.0.0.1:9108/metrics; None to disable
 open_trades = {}
 MAX_OPEN = 1
 DAILY_DRAWDOWN_LIMIT = 100
-current_equity = 0
-peak_equity = 0
-trading_paused = False
+COMMISSION_PER_TRADE = 0.78
 num_contracts = 1
 
+MODEL = MeanReversion(
+    lookback=LOOKBACK, threshold_factor=THRESHOLD, stop_ticks=TICKS, tick_size=TICK_SIZE
+)
+
 
-tick_q = queue.Queue()
-bar_q = queue.Queue()
 stop_event = threading.Event()
+STATS = TradeStats(TICK_VALUE)  # live session, same metrics as overview_bt
+
+fastlog.configure(levels=LOG_LEVELS, path=LOG_FILE)
+log = get_logger("main")
+rest_log = get_logger("rest")
+bar_log = get_logger("bars")
+ws_log = get_logger("ws")
+strategy_log = get_logger("strategy")
+
+
+# ---------- Metrics -------------
+TICKS_IN = {
+    MSG_TRADES: REGISTRY.counter("ws_ticks_total", "Ticks received", type="trade"),
+    MSG_QUOTES: REGISTRY.counter("ws_ticks_total", "Ticks received", type="quote"),
+}
+BAD_MESSAGES = REGISTRY.counter("ws_bad_messages_total", "Undecodable WebSocket messages")
+STRATEGY_SECONDS = REGISTRY.histogram(
+    "strategy_eval_seconds", "Time spent in strategy() per bar"
+)
+BARS_EMITTED = {
+    sym: REGISTRY.counter("bars_emitted_total", "Bars published", symbol=sym)
+    for sym in SYMBOLS
+}
+
+
+def rest_latency(endpoint):
+    return REGISTRY.histogram(
+        "rest_latency_seconds", "IronbeamREST call latency", endpoint=endpoint
+    )
+
+
+def register_metrics(engine, reconnector, risk, capture=None):
+    """Scrape-time gauges over the engine's own counters; nothing on the hot path."""
+    started = timemod.time()
+    for sym in SYMBOLS:
+        REGISTRY.gauge(
+            "bars_expected",
+            "Seconds since start, one bar each",
+            fn=lambda: int(timemod.time() - started),
+            symbol=sym,
+        )
+    for shard in engine.shards:
+        i = str(shard.index)
+        REGISTRY.gauge("tick_q_depth", "Ticks waiting in the shard ring",
+                       fn=lambda s=shard: s.ticks.occupancy, shard=i)
+        REGISTRY.gauge("tick_q_high_watermark", "Peak tick ring occupancy",
+                       fn=lambda s=shard: s.ticks.high_watermark, shard=i)
+        REGISTRY.counter("tick_q_dropped_total", "Trades dropped past the spill limit",
+                         fn=lambda s=shard: s.ingest.trades_dropped, shard=i)
+        REGISTRY.gauge("bar_q_depth", "Bars waiting for the strategy",
+                       fn=lambda s=shard: s.bars.occupancy, shard=i)
+        REGISTRY.counter("quotes_conflated_total", "Quotes merged before the ring",
+                         fn=lambda s=shard: s.ingest.quotes_conflated, shard=i)
+        REGISTRY.counter("trades_spilled_total", "Trade batches spilled on overload",
+                         fn=lambda s=shard: s.ingest.trades_spilled, shard=i)
+        REGISTRY.gauge("ingest_blocked_seconds", "Time the WS thread spent blocked",
+                       fn=lambda s=shard: s.ingest.blocked_secs, shard=i)
+    if engine.backfill is not None:
+        REGISTRY.counter("backfill_bars_total", "Bars rebuilt after an outage", source="rest",
+                         fn=lambda: engine.backfill.bars_fetched)
+        REGISTRY.counter("backfill_bars_total", "Bars rebuilt after an outage", source="synthetic",
+                         fn=lambda: engine.backfill.bars_carried)
+    REGISTRY.counter("ws_reconnects_total", "Stream reconnects",
+                     fn=lambda: reconnector.reconnects)
+    REGISTRY.gauge("ws_first_tick_seconds", "Connect-to-first-tick time, last reconnect",
+                   fn=lambda: reconnector.first_tick_latency[-1]
+                   if reconnector.first_tick_latency else None)
+    if capture is not None:
+        REGISTRY.counter("capture_messages_total", "Raw messages written to the capture log",
+                         fn=lambda: capture.messages)
+        REGISTRY.counter("capture_dropped_total", "Raw messages lost on a full capture queue",
+                         fn=lambda: capture.dropped)
+    REGISTRY.gauge("risk_equity", "Session PnL, realized + unrealized", fn=lambda: risk.equity)
+    REGISTRY.gauge("risk_drawdown", "Drawdown from the session peak", fn=lambda: risk.drawdown)
+    REGISTRY.gauge("risk_paused", "1 while new entries are paused", fn=lambda: risk.paused)
+    for name in ("total_trades", "win_rate", "profit_factor", "sharpe_ratio", "max_dd_pnl", "net_pnl"):
+        REGISTRY.gauge(f"trades_{name}", f"Live {name.replace('_', ' ')}",
+                       fn=lambda k=name: STATS.snapshot().get(k))
 
 
 # ---------- REST Client ---------------
@@ -72,11 +183,22 @@ class IronbeamREST:
         self.token = None
         self.account_id = account_id
         self.session = requests.Session()
+        self._latency = {}  # endpoint -> Histogram, looked up once
+
+    def _request(self, endpoint, method, url, **kwargs):
+        t0 = timemod.perf_counter()
+        try:
+            return self.session.request(method, url, **kwargs)
+        finally:
+            hist = self._latency.get(endpoint)
+            if hist is None:
+                hist = self._latency[endpoint] = rest_latency(endpoint)
+            hist.observe(timemod.perf_counter() - t0)
 
     def auth(self, username, api_key):
         url = f"{self.base}/v2/auth"
         payload = {"Username": username, "ApiKey": api_key}
-        r = self.session.post(url, json=payload, timeout=10)
+        r = self._request("auth", "POST", url, json=payload, timeout=10)
         r.raise_for_status()
         self.token = r.json().get("token")
         self.session.headers.update({"Authorization": f"Bearer {self.token}"})
@@ -84,23 +206,41 @@ class IronbeamREST:
 
     def create_stream(self):
         url = f"{self.base}/v2/stream/create"
-        r = self.session.get(url, timeout=10)
+        r = self._request("stream_create", "GET", url, timeout=10)
         r.raise_for_status()
         return r.json()
 
+    def subscribe_quotes(self, stream_id, symbols):
+        url = f"{self.base}/v1/market/quotes/subscribe/{stream_id}?symbols={','.join(symbols)}"
+        return self._request("subscribe_quotes", "GET", url, timeout=5)
+
+    def subscribe_trades(self, stream_id, symbols):
+        url = f"{self.base}/v1/market/trades/subscribe/{stream_id}?symbols={','.join(symbols)}"
+        return self._request("subscribe_trades", "GET", url, timeout=5)
+
+    def get_trades(self, symbol, start_ms, end_ms, max_trades=10000, timeout=5):
+        url = f"{self.base}/v2/market/trades/{symbol}/{start_ms}/{end_ms}/{max_trades}/false"
+        try:
+            resp = self._request("trades", "GET", url, timeout=timeout)
+            resp.raise_for_status()
+            return resp.json().get("trades") or []
+        except requests.exceptions.RequestException as e:
+            rest_log.error("❌ Error fetching trades: %s", e, every=5.0)
+            return []
+
     def get_balance(self):
         url = f"{self.base}/v2/account/{self.account_id}/balance"
         try:
-            resp = self.session.get(url, timeout=10)
+            resp = self._request("balance", "GET", url, timeout=10)
             resp.raise_for_status()
             data = resp.json()
 
             balance = data["balances"][0]["totalEquity"]
-            print(f"💰 Current balance: {balance}")
+            rest_log.info("💰 Current balance: %s", balance)
             return float(balance) if balance else None
 
         except requests.exceptions.RequestException as e:
-            print(f"❌ Error fetching open orders: {e}")
+            rest_log.error("❌ Error fetching balance: %s", e, every=5.0)
             return []
 
     def place_order(
@@ -119,19 +259,19 @@ class IronbeamREST:
             "quantity": qty,
         }
 
-        r = self.session.post(url, json=body, timeout=10)
+        r = self._request("place_order", "POST", url, json=body, timeout=10)
         try:
             return r.json()
         except Exception:
             return {"error": r.text}
 
-    def get_open_orders(self):
+    def get_open_orders(self, strict=False):
 
         url = f"{self.base}/v2/account/{self.account_id}/positions"
         headers = {"Authorization": f"Bearer {self.token}"}
 
         try:
-            resp = self.session.get(url, headers=headers, timeout=10)
+            resp = self._request("positions", "GET", url, headers=headers, timeout=10)
             resp.raise_for_status()
             data = resp.json()
 
@@ -153,243 +293,202 @@ class IronbeamREST:
             return pos_list
 
         except requests.exceptions.RequestException as e:
-            print(f"❌ Error fetching open orders: {e}")
+            rest_log.error("❌ Error fetching open orders: %s", e, every=5.0)
+            if strict:
+                raise
             return []
 
 
-# ---------- Bar Aggregator -------------
-def bar_builder(trade_only: bool = True):
+# ---------- Bar Recorder -------------
+def data_gather_file(symbol):
+    if symbol == SYMBOL:
+        return DATA_GATHER_FILE
+    root = symbol.split(":")[-1].split(".")[0]
+    return f"data/{root}_1s_{date.today():%m.%d.%Y}.csv"
 
-    current_sec = int(timemod.time())
-    o = h = l = c = None
-    vol = 0
 
-    while not stop_event.is_set():
-        sec_start = timemod.time()
-
-        ticks_this_sec = []
-        while True:
-            try:
-                tick = tick_q.get_nowait()
-                ticks_this_sec.append(tick)
-            except queue.Empty:
-                break
-
-        prices = []
-        sizes = []
-
-        for t in ticks_this_sec:
-            if "price" in t:  # trade tick
-                prices.append(t["price"])
-                sizes.append(t.get("size", 0))
-            elif not trade_only and "bid" in t and "ask" in t:  # quote tick
-                mid = (t["bid"] + t["ask"]) / 2.0
-                prices.append(mid)
-                sizes.append((t.get("bid_size", 0) + t.get("ask_size", 0)) / 2.0)
-
-        # Update OHLCV
-        if prices:
-            if o is None:
-                o = prices[0]
-            h = max(prices) if h is None else max(h, max(prices))
-            l = min(prices) if l is None else min(l, min(prices))
-            c = prices[-1]
-            vol += sum(sizes)
-        else:
-            if c is not None:
-                o = h = l = c
-                vol = 0
-
-        now_sec = int(timemod.time())
-        if now_sec > current_sec and c is not None:
-            bar = {
-                "t": current_sec,
-                "open": o,
-                "high": h,
-                "low": l,
-                "close": c,
-                "volume": vol,
-            }
-            bar_q.put(bar)
-            print("BAR:", bar)
-
-            with open(DATA_GATHER_FILE, mode="a", newline="") as f:
-                writer = csv.DictWriter(f, fieldnames=bar.keys())
-                writer.writerow(bar)
-
-            current_sec = now_sec
-            o = h = l = c
-            vol = 0
-
-        elapsed = timemod.time() - sec_start
-        if elapsed < 1.0:
-            timemod.sleep(1.0 - elapsed)
+_headed_files = set()
+
+
+def record_bar(symbol, bar):
+    bar_log.info("BAR: %s %s", symbol, bar)
+    counter = BARS_EMITTED.get(symbol)
+    if counter is not None:
+        counter.inc()
+
+    if bar.get("synthetic"):
+        return  # carried over an outage, not observed: leave a gap in the file
+
+    path = data_gather_file(symbol)
+    with open(path, mode="a", newline="") as f:
+        # New day files get the header data_quality / the backtests expect.
+        if path not in _headed_files:
+            if f.tell() == 0:
+                f.write(DATA_HEADER + "\n")
+            _headed_files.add(path)
+        writer = csv.DictWriter(f, fieldnames=bar.keys())
+        writer.writerow(bar)
 
 
 from collections import deque
 
 
-def strategy(rest, bar):
+def arm_exits(exits, risk, symbol, side, qty, entry):
+    side = "BUY" if str(side).upper() in ("BUY", "LONG") else "SELL"
+    stop, target = MODEL.bracket(side, entry)
+    risk.on_entry(symbol, side, qty, entry)
+    return exits.arm(symbol, side, qty, entry, stop, target)
 
-    if not hasattr(strategy, "closes"):
-        strategy.closes = deque(maxlen=120)
 
-    balance = rest.get_balance()
+def session_date(t):
+    return datetime.fromtimestamp(t, ZoneInfo("America/New_York")).date()
 
-    if balance <= 1509:
-        print("no soup for you.......")
-        return None
 
-    strategy.closes.append(bar["close"])
+def strategy(rest, exits, risk, books, symbol, bar, state):
 
-    if len(strategy.closes) < 120:
-        print("wait for it....")
-        return None
+    # Same calls the backtest makes: the window advances on every bar and
+    # the model only signals while we're flat.
+    state["position"] = "BUY" if exits.is_armed(symbol) else None
+    signal = MODEL.on_bar(bar, state)
 
-    closes = np.array(strategy.closes)
-    mean_close = closes.mean()
-    current_close = closes[-1]
+    # Drawdown limits are intraday: a new ET date starts a fresh session.
+    session = session_date(bar["t"])
+    if session != risk.session:
+        risk.new_session(session)
 
-    threshold = 0.00075 * mean_close
+    if not MODEL.is_warm(state):
+        strategy_log.info("wait for it....", every=10.0)
+        return None
 
-    open_orders = rest.get_open_orders()
+    if signal is None:
+        return None
 
-    if len(open_orders) > 0:
-        pos = open_orders[0]
-        pl = pos["unrealizedPL"]
-
-        if pl >= 25:
-            rest.place_order(
-                SYMBOL,
-                "SELL",
-                num_contracts,
-                "MARKET",
-            )
-        elif pl <= -25:
-            rest.place_order(
-                SYMBOL,
-                "SELL",
-                num_contracts,
-                "MARKET",
-            )
+    if not risk.allow_entry():
+        strategy_log.warning("no soup for you....... (%s)", risk.pause_reason, every=60.0)
         return None
 
     now = datetime.now(ZoneInfo("America/New_York"))
     stop_dt = datetime(2025, 10, 31, 16, 0, tzinfo=ZoneInfo("America/New_York"))
 
     if now >= stop_dt:
-        print(
-            "🛑 Market closed for the day — stopping trading after Oct 30, 2025 4:00 PM ET."
+        strategy_log.warning(
+            "🛑 Market closed for the day — stopping trading after Oct 30, 2025 4:00 PM ET.",
+            every=60.0,
         )
         return None
 
-    if current_close < mean_close - threshold:
-        rest.place_order(
-            SYMBOL,
-            "BUY",
-            num_contracts,
-            "MARKET",
+    # A position we aren't tracking (e.g. from before a restart) gets its
+    # bracket re-armed instead of stacking a second entry.
+    open_orders = [p for p in rest.get_open_orders() if p["symbol"] == symbol]
+    if len(open_orders) > 0:
+        pos = open_orders[0]
+        arm_exits(
+            exits, risk, symbol, pos["side"], pos["quantity"], float(pos["entry_price"])
         )
+        return None
+
+    resp = rest.place_order(
+        symbol,
+        signal["side"],
+        num_contracts,
+        "MARKET",
+    )
+    if "error" in resp:
+        strategy_log.error("❌ Entry order failed: %s", resp)
+        return None
+
+    # A market BUY fills at the offer, so bracket off the live ask.
+    book = books.get(symbol)
+    if book is not None and book.ask is not None and book.age() <= MAX_QUOTE_AGE:
+        entry = book.ask
+    else:
+        entry = signal["entry"]
+    arm_exits(exits, risk, symbol, signal["side"], num_contracts, entry)
 
     return None
 
 
-strategy.ranges = deque(maxlen=20)
+def position_open(rest, symbol):
+    """True/False from the broker's positions, None if they can't be fetched."""
+    try:
+        positions = rest.get_open_orders(strict=True)
+    except requests.exceptions.RequestException:
+        return None
+    return any(p["symbol"] == symbol for p in positions)
 
 
-def trade_loop(rest):
-    while not stop_event.is_set():
-        try:
-            bar = bar_q.get(timeout=1)
-        except queue.Empty:
-            continue
+def on_exit_give_up(risk, bracket, why):
+    log.error("🚨 %s position left without a working exit: %s", bracket.symbol, why)
+    risk.halt(f"{bracket.symbol} exit: {why}")
+
 
-        strategy(rest, bar)
+def on_exit(risk, bracket, price, reason):
+    risk.on_exit(bracket.symbol, price)
+    direction = 1 if bracket.side == "BUY" else -1
+    ticks = int((price - bracket.entry) * direction / TICK_SIZE)
+    STATS.add(
+        ticks,
+        "WIN" if reason == "TARGET" else "LOSS",
+        timemod.time() - bracket.opened_at,
+    )
+    s = STATS.snapshot()
+    strategy_log.info(
+        "📊 %d trades, win rate %.1f%%, net $%.2f, PF %.2f, max DD $%.2f",
+        s["total_trades"], s["win_rate"], s["net_pnl"], s["profit_factor"], s["max_dd_pnl"],
+    )
 
 
 # ========== WEBSOCKET STREAMING (correct usage of websocket-client) ==========
-def start_streaming(rest):
+def start_streaming(rest, reconnector, engine, exits, risk, books, capture=None):
     while not stop_event.is_set():
         try:
             sr = rest.create_stream()
             stream_id = sr.get("streamId")
             if not stream_id:
-                print("No streamId returned:", sr)
-                timemod.sleep(5)
+                ws_log.error("No streamId returned: %s", sr)
+                timemod.sleep(reconnector.next_delay())
                 continue
 
             ws_url = (
                 f"wss://live.ironbeamapi.com/v2/stream/{stream_id}?token={rest.token}"
             )
-            print("Connecting to", ws_url)
+            ws_log.info("Connecting to %s", ws_url)
 
             def on_open(ws):
-                print("WebSocket opened.")
-
-                headers = {"Authorization": f"Bearer {rest.token}"}
-
-                quotes_url = f"{BASE_URL}/v1/market/quotes/subscribe/{stream_id}?symbols={SYMBOL}"
-                try:
-                    r_q = requests.get(quotes_url, headers=headers, timeout=5)
-                    print("Quotes subscribe:", r_q.status_code, r_q.text[:500])
-                except Exception as e:
-                    print("Failed to subscribe quotes:", e)
-
-                trades_url = f"{BASE_URL}/v1/market/trades/subscribe/{stream_id}?symbols={SYMBOL}"
-                try:
-                    r_t = requests.get(trades_url, headers=headers, timeout=5)
-                    print("Trades subscribe:", r_t.status_code, r_t.text[:500])
-                except Exception as e:
-                    print("Failed to subscribe trades:", e)
+                ws_log.info("WebSocket opened.")
+                reconnector.subscribe(stream_id)
 
             def on_message(ws, message):
-                try:
-                    data = json.loads(message)
-
-                except Exception as e:
-                    print("Bad WS message:", message, e)
+                if capture is not None:
+                    capture.put(message)
+                kind, records = decode_message(message)
+                if kind == MSG_BAD:
+                    BAD_MESSAGES.inc()
+                    ws_log.warning("Bad WS message: %s", message, every=1.0)
                     return
 
-                # Ping
-                if "p" in data and "ping" in data["p"]:
-                    return
-
-                # Balance updates
-                if "b" in data:
-                    return
-
-                if "q" in data:
-
-                    for q in data["q"]:
-                        tick_q.put(
-                            {
-                                "bid": q.get("b"),
-                                "ask": q.get("a"),
-                                "bid_size": q.get("bs"),
-                                "ask_size": q.get("as"),
-                                "last": q.get("la"),
-                                "ts": q.get("at"),
-                            }
-                        )
-                    return
-
-                # Trades come under "tr"
-                if "tr" in data:
-                    for trade in data["tr"]:
-                        tick_q.put(
-                            {
-                                "price": trade.get("p"),
-                                "size": trade.get("sz"),
-                                "ts": trade.get("st"),
-                            }
-                        )
-                    return
+                if records:
+                    TICKS_IN[kind].inc(len(records))
+                    if reconnector.awaiting_tick:
+                        reconnector.mark_first_tick()
+                    if kind == MSG_QUOTES:
+                        # Quotes update the book in place; the bar engine only
+                        # wants them when it builds bars from mids.
+                        for book in books.on_quotes(records):
+                            exits.on_book(book)
+                        if engine.trade_only:
+                            return
+                    elif kind == MSG_TRADES:
+                        books.on_trades(records)
+                        exits.on_trades(records)
+                        risk.on_trades(records)
+                    engine.route(records)
 
             def on_error(ws, err):
-                print("WebSocket error:", err)
+                ws_log.error("WebSocket error: %s", err)
 
             def on_close(ws, close_status_code, close_msg):
-                print("WebSocket closed:", close_status_code, close_msg)
+                ws_log.warning("WebSocket closed: %s %s", close_status_code, close_msg)
 
             ws_app = WebSocketApp(
                 ws_url,
@@ -400,27 +499,140 @@ def start_streaming(rest):
             )
 
             ws_app.run_forever()
-            print("WebSocket run_forever ended, reconnecting in 1s...")
-            timemod.sleep(1)
+            reconnector.connection_lost()
+            delay = reconnector.next_delay()
+            ws_log.info("WebSocket run_forever ended, reconnecting in %.2fs...", delay)
+            timemod.sleep(delay)
 
         except Exception as e:
-            print("Exception in start_streaming:", e)
-            traceback.print_exc()
-            timemod.sleep(2)
+            ws_log.error("Exception in start_streaming: %s\n%s", e, traceback.format_exc())
+            reconnector.connection_lost()
+            timemod.sleep(reconnector.next_delay())
+
+
+# ---------- Recovery -------------
+def recover(rest, exits, risk, engine, journal):
+    """Restore windows, brackets and account state after a restart."""
+    t0 = timemod.perf_counter()
+    saved = journal.restore()
+    log.info("Journal restored in %.1fms", (timemod.perf_counter() - t0) * 1000)
+
+    # Session PnL and any pause only carry over within the same trading day.
+    account = saved["account"]
+    today = session_date(timemod.time())
+    if saved["last_write"] and session_date(saved["last_write"]) == today:
+        risk.restore(
+            today,
+            account["realized"],
+            account["peak_equity"],
+            account["trading_paused"],
+        )
+        log.info("Risk restored", **risk.snapshot())
+    else:
+        risk.new_session(today)
+
+    # Windows: the journal when it is fresh, otherwise the recorded CSV.
+    now = timemod.time()
+    for symbol in SYMBOLS:
+        rows = saved["windows"].get(symbol) or []
+        if rows and now - rows[-1][0] <= WARM_START_MAX_AGE:
+            # Same contiguity cut as the CSV path: the journal can still hold
+            # bars from before an earlier outage behind the fresh ones.
+            rows = rows[-(LOOKBACK - 1) :]
+            rows = rows[contiguous_start([t for t, _ in rows]) :]
+            bars = [
+                {"t": t, "open": c, "high": c, "low": c, "close": c, "volume": 0}
+                for t, c in rows
+            ]
+            source = "journal"
+        else:
+            bars = warm_start_bars(
+                data_gather_file(symbol), LOOKBACK - 1, max_age=WARM_START_MAX_AGE
+            )
+            source = "recorded"
+        if bars:
+            MODEL.seed(engine.states[symbol], [b["close"] for b in bars])
+            engine.seed(symbol, bars)
+            log.info("Warm start %s: %d %s bars", symbol, len(bars), source)
+
+    # Brackets: keep the ones the broker still has a position for, and
+    # bracket any position we didn't know about.
+    positions = {p["symbol"]: p for p in rest.get_open_orders()}
+    for b in saved["brackets"]:
+        if b["symbol"] in positions:
+            risk.on_entry(b["symbol"], b["side"], b["qty"], b["entry"])
+            exits.arm(**b)
+        else:
+            log.warning("Dropping %s bracket: position closed while down", b["symbol"])
+    for symbol, pos in positions.items():
+        if symbol in SYMBOLS and not exits.is_armed(symbol):
+            arm_exits(
+                exits, risk, symbol, pos["side"], pos["quantity"], float(pos["entry_price"])
+            )
+    journal.record_brackets(exits.brackets())
 
 
 # ---------- Main Runner -------------
 def main():
     rest = IronbeamREST(BASE_URL, ACCOUNT_ID)
     token = rest.auth(ACCOUNT_ID, API_KEY)
-    print("Authentication successful, token acquired.")
+    log.info("Authentication successful, token acquired.")
+
+    reconnector = StreamReconnector(rest, SYMBOLS)
+    journal = StateJournal(SNAPSHOT_FILE, lookback=LOOKBACK)
+    risk = RiskEngine(
+        DAILY_DRAWDOWN_LIMIT,
+        point_value=TICK_VALUE / TICK_SIZE,
+        commission=COMMISSION_PER_TRADE,
+        on_change=journal.record_account,
+    )
+    exits = ExitManager(
+        lambda symbol, side, qty: rest.place_order(symbol, side, qty, "MARKET"),
+        MODEL.on_tick,
+        on_exit=lambda bracket, price, reason, resp: on_exit(risk, bracket, price, reason),
+        position_open=lambda symbol: position_open(rest, symbol),
+        on_give_up=lambda bracket, why: on_exit_give_up(risk, bracket, why),
+        on_change=journal.record_brackets,
+    )
+    books = Books(SYMBOLS)
+
+    def on_bar(symbol, bar, state):
+        with STRATEGY_SECONDS.time():
+            strategy(rest, exits, risk, books, symbol, bar, state)
+        if not bar.get("synthetic"):
+            journal.record_bar(symbol, bar["t"], bar["close"])
+
+    engine = MultiSymbolEngine(
+        SYMBOLS,
+        on_bar=on_bar,
+        stream=reconnector,
+        backfill=GapBackfill(rest_trade_source(rest, BACKFILL_BUDGET), budget=BACKFILL_BUDGET),
+        recorder=record_bar,
+        workers=NUM_WORKERS,
+        overload=OVERLOAD_POLICY,
+    )
+
+    # Pick up where the last run left off so a restart doesn't sit out
+    # the first LOOKBACK seconds or lose track of open positions.
+    recover(rest, exits, risk, engine, journal)
+
+    capture = CaptureWriter(CAPTURE_DIR).start() if CAPTURE_DIR else None
+
+    if METRICS_PORT:
+        register_metrics(engine, reconnector, risk, capture)
+        serve_metrics(METRICS_PORT)
 
     # Threads
-    threading.Thread(target=bar_builder, daemon=True).start()
-    threading.Thread(target=trade_loop, args=(rest,), daemon=True).start()
+    engine.start(stop_event)
 
     # Start data stream
-    start_streaming(rest)
+    try:
+        start_streaming(rest, reconnector, engine, exits, risk, books, capture)
+    finally:
+        # Write out whatever raw messages are still buffered for replay.
+        if capture is not None:
+            capture.stop()
+            log.info("Capture closed", **capture.stats())
 
 
 if __name__ == "__main__":
@@ -428,4 +640,5 @@ if __name__ == "__main__":
         main()
     except KeyboardInterrupt:
         stop_event.set()
-        print("Shutdown initiated.")
+        log.info("Shutdown initiated.")
+        fastlog.flush()
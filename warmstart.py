@@ -0,0 +1,69 @@
+import os
+import time
+
+BAR_FIELDS = ("t", "open", "high", "low", "close", "volume")
+
+
+def read_tail_bars(path, count, block_size=64 * 1024):
+    """Parse the last `count` bars of a recorded 1s CSV without reading it all.
+
+    Header rows and malformed lines are skipped, so this works on files
+    with or without the "time,open,..." header.
+    """
+    if count <= 0 or not os.path.exists(path):
+        return []
+
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        data = b""
+        while pos > 0 and data.count(b"\n") <= count + 1:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+
+    lines = data.splitlines()
+    if pos > 0:
+        lines = lines[1:]  # first line is probably cut in half
+
+    bars = []
+    for line in lines[-(count + 1) :]:
+        parts = line.split(b",")
+        if len(parts) != 6:
+            continue
+        try:
+            t = int(float(parts[0]))
+            values = [float(p) for p in parts[1:]]
+        except ValueError:
+            continue
+        bars.append(dict(zip(BAR_FIELDS, [t] + values)))
+    return bars[-count:]
+
+
+def contiguous_start(times, max_gap=5):
+    """Index where the trailing run of timestamps at most `max_gap` apart begins."""
+    start = len(times) - 1
+    while start > 0 and 0 < times[start] - times[start - 1] <= max_gap:
+        start -= 1
+    return max(start, 0)
+
+
+def warm_start_bars(path, lookback, max_age=60, max_gap=5, now=None):
+    """Most recent contiguous run of recorded bars, or [] if it is stale.
+
+    Bars count as contiguous while consecutive timestamps increase by at
+    most `max_gap` seconds; the run is rejected outright if its last bar
+    is more than `max_age` seconds old.
+    """
+    bars = read_tail_bars(path, lookback)
+    if not bars:
+        return []
+
+    now = time.time() if now is None else now
+    age = now - bars[-1]["t"]
+    if age > max_age:
+        print(f"Warm start skipped: {path} is {age:.0f}s old")
+        return []
+
+    return bars[contiguous_start([b["t"] for b in bars], max_gap) :]